@@ -1,10 +1,23 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, make_response, g
 from flask_cors import CORS
 from config import Config
 from services.database import DatabaseService
 from services.wms_integration import WMSIntegration
 from services.data_processor import DataProcessor
+from services.response_cache import ResponseCache
+from services.sync_state import SyncState
+from services.sync_scheduler import SyncScheduler
+from services.file_watcher import FileWatcher
+from services.event_bus import EventBus, SubscriberLimitError
+from services.metrics_store import MetricsStore
+from services.export import EXPORT_FORMATS, gzip_chunks
+from services.snapshot_store import SNAPSHOT_TABLES
+from services.location_index import LocationIndex
+from services.perf import recorder as perf
+from functools import wraps
+import hashlib
 import json
+import time
 from datetime import datetime
 
 app = Flask(__name__)
@@ -15,6 +28,64 @@ CORS(app)
 db_service = DatabaseService()
 wms_integration = WMSIntegration()
 data_processor = DataProcessor()
+sync_state = SyncState(Config.SYNC_STATE_FILE)
+response_cache = ResponseCache(
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    max_bytes=Config.CACHE_MAX_BYTES
+)
+event_bus = EventBus(max_subscribers=Config.SSE_MAX_CLIENTS)
+metrics_store = MetricsStore(Config.METRICS_DB_PATH, retention_days=Config.METRICS_RETENTION_DAYS)
+
+# Cache tags whose data changes when a sync writes to the database
+SYNC_CACHE_TAGS = ('metrics', 'inventory', 'orders', 'locations', 'charts', 'trends')
+
+def cached_response(tag):
+    """Serve successful responses from the response cache, keyed by endpoint and query args"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            ttl = Config.CACHE_TTLS.get(tag, 0)
+            if not Config.CACHE_ENABLED or ttl <= 0:
+                return view(*args, **kwargs)
+            
+            key = (tag, tuple(sorted(request.args.items(multi=True))))
+            body = response_cache.get(key)
+            if body is not None:
+                response = app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            
+            # Mock data served after a database error must not outlive the outage
+            db_service.take_mock_fallback()
+            response = make_response(view(*args, **kwargs))
+            if db_service.take_mock_fallback():
+                g.skip_response_cache = True
+            if response.status_code == 200 and not g.get('skip_response_cache'):
+                response_cache.set(key, response.get_data(), ttl, tag=tag)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_timing(response):
+    """Record each request's latency under its route and report it in Server-Timing"""
+    started = g.pop('request_started', None)
+    if started is not None and perf.enabled:
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        # Streamed bodies are timed up to their first byte
+        perf.observe(
+            'http', f"{request.method} {route}", elapsed,
+            nbytes=None if response.is_streamed else response.content_length,
+            error=response.status_code >= 500
+        )
+        response.headers['Server-Timing'] = f"app;dur={elapsed * 1000:.1f}"
+    return response
 
 @app.route('/')
 def index():
@@ -48,10 +119,18 @@ def integration():
 
 # API Routes
 @app.route('/api/metrics')
+@cached_response('metrics')
 def get_metrics():
-    """Get warehouse performance metrics"""
+    """Get warehouse performance metrics from the latest snapshot"""
     try:
-        metrics = db_service.get_warehouse_metrics()
+        metrics = metrics_store.latest()
+        if metrics is None:
+            # No sync has run yet; take the first snapshot now
+            try:
+                metrics = take_metrics_snapshot()
+            except Exception as e:
+                app.logger.warning(f"Could not take metrics snapshot: {e}")
+                metrics = db_service.get_warehouse_metrics()
         return jsonify({
             'success': True,
             'data': metrics
@@ -62,18 +141,62 @@ def get_metrics():
             'error': str(e)
         }), 500
 
+@app.route('/api/metrics/history')
+def get_metrics_history():
+    """Get metric snapshots over time (metrics=a,b&hours=24&limit=500)"""
+    try:
+        fields = [f for value in request.args.getlist('metrics') for f in value.split(',') if f] or None
+        hours = request.args.get('hours', 24, type=float)
+        limit = max(1, min(request.args.get('limit', 1000, type=int), Config.API_MAX_PAGE_SIZE))
+        history = metrics_store.history(fields, since=datetime.now().timestamp() - hours * 3600, limit=limit)
+        return jsonify({
+            'success': True,
+            'data': history
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _get_page_args():
+    """Read limit/cursor query args; returns (None, None) for an unpaged request"""
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor') or None
+    if limit is None and cursor is None:
+        return None, None
+    limit = limit or Config.API_PAGE_SIZE
+    return max(1, min(limit, Config.API_MAX_PAGE_SIZE)), cursor
+
 @app.route('/api/inventory')
+@cached_response('inventory')
 def get_inventory():
     """Get inventory data"""
     try:
         search = request.args.get('search', '')
         category = request.args.get('category', '')
+        limit, cursor = _get_page_args()
         
-        inventory = db_service.get_inventory_data(search, category)
+        next_cursor = None
+        if limit:
+            inventory, next_cursor = db_service.get_inventory_page(search, category, limit, cursor)
+        else:
+            inventory = db_service.get_inventory_data(search, category)
         return jsonify({
             'success': True,
-            'data': inventory
+            'data': inventory,
+            'next_cursor': next_cursor
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -81,17 +204,29 @@ def get_inventory():
         }), 500
 
 @app.route('/api/orders')
+@cached_response('orders')
 def get_orders():
     """Get order data"""
     try:
         status = request.args.get('status', '')
         priority = request.args.get('priority', '')
+        limit, cursor = _get_page_args()
         
-        orders = db_service.get_orders_data(status, priority)
+        next_cursor = None
+        if limit:
+            orders, next_cursor = db_service.get_orders_page(status, priority, limit, cursor)
+        else:
+            orders = db_service.get_orders_data(status, priority)
         return jsonify({
             'success': True,
-            'data': orders
+            'data': orders,
+            'next_cursor': next_cursor
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -99,14 +234,36 @@ def get_orders():
         }), 500
 
 @app.route('/api/locations')
+@cached_response('locations')
 def get_locations():
-    """Get location utilization data"""
+    """Get location utilization rolled up to a level (level=zone|aisle|rack|shelf, zone=, aisle=, rack=)"""
     try:
-        locations = db_service.get_location_data()
+        index = data_processor.locations
+        if index is None:
+            try:
+                index = data_processor.refresh_locations(db_service.get_location_rows())
+            except Exception as e:
+                # Serve mock rows without keeping them, so the next request retries
+                app.logger.error(f"Error fetching locations: {e}")
+                index = LocationIndex(db_service.get_mock_location_rows())
+                g.skip_response_cache = True
+        
+        locations = index.nodes(
+            request.args.get('level', 'shelf'),
+            zone=request.args.get('zone'),
+            aisle=request.args.get('aisle'),
+            rack=request.args.get('rack')
+        )
         return jsonify({
             'success': True,
-            'data': locations
+            'data': locations,
+            'totals': index.totals()
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -119,9 +276,19 @@ def get_integration_status():
     try:
         status = {
             'database': db_service.check_connection(),
+            'database_pool': db_service.get_pool_stats(),
             'wms_app': wms_integration.check_connection(),
+            'wms_fetch_timings': wms_integration.last_fetch_timings,
+            'wms_commands': wms_integration.command_stats(),
+            'wms_transports': wms_integration.transport_status(),
             'last_sync': data_processor.get_last_sync_time(),
-            'total_records': db_service.get_total_records()
+            'sync': sync_scheduler.status(),
+            'file_watcher': file_watcher.status(),
+            'rejected_records': data_processor.get_reject_summary(),
+            'total_records': db_service.get_total_records(),
+            'response_cache': response_cache.stats(),
+            'event_stream': event_bus.stats(),
+            'table_snapshots': data_processor.snapshots.status()
         }
         return jsonify({
             'success': True,
@@ -133,22 +300,283 @@ def get_integration_status():
             'error': str(e)
         }), 500
 
+def run_sync(job, report):
+    """Fetch, process and store one WMS sync, reporting progress on the job"""
+    # A full sync ignores the high-water marks; entities an earlier sync left
+    # part way through continue from where it stopped
+    full = job['mode'] == 'full'
+    since = {} if full else sync_state.since()
+    resume = {} if full else sync_state.resume_points()
+    for entity, point in resume.items():
+        if point['since'] is None:
+            since.pop(entity, None)
+        else:
+            since[entity] = point['since']
+    offsets = {entity: point['offset'] for entity, point in resume.items()}
+    max_records = Config.MAX_RECORDS_PER_SYNC
+    
+    # Process and store each batch as it arrives so memory stays bounded
+    rows_affected = {'inventory': 0, 'orders': 0}
+    deltas = {'inventory': [], 'orders': []}
+    changed = {'inventory': 0, 'orders': 0}
+    marks = {}
+    status = {}
+    written = {}
+    records_seen = 0
+    batches = 0
+    
+    # Backfill the stock trend buckets from the database on a full sync or the first run
+    if job['mode'] == 'full' or data_processor.trends.is_empty():
+        report(stage='backfilling trends')
+        try:
+            data_processor.trends.rebuild(
+                db_service.iter_transactions(Config.TREND_DAILY_RETENTION_DAYS),
+                db_service.get_stock_levels()
+            )
+        except Exception as e:
+            app.logger.warning(f"Could not backfill stock trends from the database: {e}")
+    
+    report(stage='fetching')
+    fetched = wms_integration.iter_latest_batches(
+        since=since or None, offsets=offsets, limit=max_records, status=status
+    )
+    for entity, records in fetched:
+        processed_data = {entity: data_processor.process_wms_batch(entity, records)}
+        for table, count in db_service.update_data(processed_data).items():
+            rows_affected[table] += count
+        sync_state.collect(processed_data, marks)
+        data_processor.update_trends(entity, processed_data[entity])
+        if entity in deltas:
+            changed[entity] += len(processed_data[entity])
+            room = Config.SSE_DELTA_LIMIT - len(deltas[entity])
+            if room > 0:
+                deltas[entity].extend(_delta_records(processed_data[entity], room))
+        
+        written[entity] = written.get(entity, 0) + len(records)
+        records_seen += len(records)
+        batches += 1
+        report(stage='writing', batches=batches, records=records_seen, rows_affected=dict(rows_affected))
+    
+    # Records of a cut-off entity may arrive unordered, so it keeps its old mark
+    # and the next sync skips the records written so far
+    truncated = sorted(entity for entity, state in status.items() if state == 'cut_off') or None
+    if truncated:
+        app.logger.warning(f"Sync stopped at MAX_RECORDS_PER_SYNC={max_records} for {', '.join(truncated)}")
+    sync_state.commit(marks, {
+        entity: None if state == 'complete'
+        else (since.get(entity), offsets.get(entity, 0) + written.get(entity, 0))
+        for entity, state in status.items()
+    })
+    
+    report(stage='finalizing', truncated=truncated)
+    try:
+        data_processor.refresh_locations(db_service.get_location_rows())
+    except Exception as e:
+        app.logger.warning(f"Could not rebuild the location index after sync: {e}")
+    if data_processor.snapshots.available:
+        report(stage='snapshotting')
+        write_table_snapshots()
+    index = db_service.search_index
+    if job['mode'] == 'full' or index is None or index.age() > Config.SEARCH_INDEX_MAX_AGE:
+        db_service.refresh_search_index()
+    data_processor.mark_synced()
+    
+    # Snapshot before invalidating so no request can re-cache the old metrics
+    try:
+        metrics = take_metrics_snapshot()
+    except Exception as e:
+        app.logger.warning(f"Could not snapshot metrics after sync: {e}")
+        metrics = None
+    response_cache.invalidate(*SYNC_CACHE_TAGS)
+    publish_sync_events(job, deltas, changed, rows_affected, metrics)
+
+def write_table_snapshots():
+    """Copy each analytics table from the database into the snapshot store"""
+    for table in SNAPSHOT_TABLES:
+        filters = {'days': Config.SNAPSHOT_TRANSACTION_DAYS} if table == 'transactions' else None
+        try:
+            with perf.timer('processor', f'snapshot.{table}') as timing:
+                timing.rows = data_processor.snapshots.write(table, db_service.iter_export(table, filters))
+        except Exception as e:
+            app.logger.warning(f"Could not snapshot table {table}: {e}")
+
+def take_metrics_snapshot():
+    """Compute the metrics and KPIs, from the table snapshots if present, and store them as the latest snapshot"""
+    aggregates = data_processor.aggregate_snapshots()
+    if aggregates is None:
+        aggregates = db_service.query_warehouse_metrics()
+    aggregates.update(data_processor.calculate_kpis(aggregates))
+    return metrics_store.record(aggregates)
+
+def _delta_records(records, limit):
+    """First limit processed records as plain dicts, from a list or a DataFrame"""
+    if hasattr(records, 'to_json'):
+        # to_json writes missing values as null, which JSON.parse accepts and NaN is not
+        return json.loads(records.head(limit).to_json(orient='records', date_format='iso'))
+    return list(records[:limit])
+
+def publish_sync_events(job, deltas, changed, rows_affected, metrics=None):
+    """Push what a sync changed to connected dashboards"""
+    for entity, records in deltas.items():
+        if changed[entity]:
+            event_bus.publish(entity, {
+                'records': records,
+                'count': changed[entity],
+                'truncated': changed[entity] > len(records)
+            })
+    
+    if metrics is not None:
+        event_bus.publish('metrics', metrics)
+    
+    event_bus.publish('sync', {
+        'job_id': job['id'],
+        'mode': job['mode'],
+        'rows_affected': rows_affected,
+        'last_sync': data_processor.get_last_sync_time()
+    })
+
+sync_scheduler = SyncScheduler(
+    run_sync,
+    interval=Config.SYNC_INTERVAL,
+    mode=Config.SYNC_MODE,
+    jitter=Config.SYNC_JITTER,
+    retry_delay=Config.SYNC_RETRY_DELAY,
+    max_backoff=Config.SYNC_MAX_BACKOFF
+)
+
+def on_wms_files_changed(paths):
+    """Sync as soon as the WMS finishes writing a data file"""
+    job, joined = sync_scheduler.trigger(trigger='file_watch')
+    if joined:
+        # The running sync may have read the file before it changed
+        sync_scheduler.wait(job['id'])
+        sync_scheduler.trigger(trigger='file_watch')
+
+file_watcher = FileWatcher(
+    wms_integration.data_files.values(),
+    on_wms_files_changed,
+    interval=Config.WMS_FILE_WATCH_INTERVAL,
+    settle_time=Config.WMS_FILE_SETTLE_TIME
+)
+
 @app.route('/api/sync', methods=['POST'])
 def sync_data():
-    """Trigger data synchronization"""
+    """Trigger data synchronization, or join the one already running or queued"""
     try:
-        # Sync data from C WMS application
-        wms_data = wms_integration.fetch_latest_data()
+        body = request.get_json(silent=True) or {}
+        mode = request.args.get('mode') or body.get('mode') or Config.SYNC_MODE
+        if mode not in ('incremental', 'full'):
+            return jsonify({
+                'success': False,
+                'error': f"Unknown sync mode: {mode}"
+            }), 400
         
-        # Process and store in database
-        processed_data = data_processor.process_wms_data(wms_data)
-        db_service.update_data(processed_data)
+        job, joined = sync_scheduler.trigger(mode=mode, trigger='api')
+        if job['status'] == 'queued':
+            message = 'Joined queued full synchronization' if joined else 'Full synchronization queued after the running one'
+        else:
+            message = 'Joined running synchronization' if joined else 'Data synchronization started'
+        return jsonify({
+            'success': True,
+            'message': message,
+            'job_id': job['id'],
+            'joined': joined,
+            'job': job
+        }), 202
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sync/<job_id>')
+def get_sync_job(job_id):
+    """Get the progress of a synchronization job"""
+    job = sync_scheduler.get_job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown sync job'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': job
+    })
+
+@app.route('/api/events')
+def stream_events():
+    """Stream metric, inventory and order updates as Server-Sent Events"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    try:
+        events = event_bus.stream(last_event_id, keepalive=Config.SSE_KEEPALIVE)
+    except SubscriberLimitError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    
+    response = app.response_class(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/export/<table>')
+def export_table(table):
+    """Stream a whole table as NDJSON or CSV (format=ndjson|csv, gzip=1), with the list filters"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}; choose from {', '.join(EXPORT_FORMATS)}")
+        mimetype, extension, encode = EXPORT_FORMATS[export_format]
         
+        # Run the query now so a failure is still a JSON error, not a cut-off download
+        rows = db_service.iter_export(table, request.args)
+        columns = [column for column, _ in next(rows)]
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    chunks = encode(columns, rows)
+    filename = f"{table}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    if request.args.get('gzip', 'false').lower() in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    response = app.response_class(chunks, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/trends')
+@cached_response('trends')
+def get_trends():
+    """Get per-SKU stock levels over time (sku=a,b or category=, days=, granularity=daily|hourly)"""
+    try:
+        skus = [s for value in request.args.getlist('sku') for s in value.split(',') if s]
+        trends = data_processor.trends.series(
+            skus=skus[:Config.API_MAX_PAGE_SIZE] or None,
+            category=request.args.get('category') or None,
+            days=max(1, min(request.args.get('days', 30, type=int), Config.TREND_DAILY_RETENTION_DAYS)),
+            granularity=request.args.get('granularity', 'daily'),
+            top=request.args.get('top', Config.TREND_CHART_SKUS, type=int)
+        )
         return jsonify({
             'success': True,
-            'message': 'Data synchronized successfully',
-            'timestamp': datetime.now().isoformat()
+            'data': trends
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -156,15 +584,58 @@ def sync_data():
         }), 500
 
 @app.route('/api/analytics/charts')
+@cached_response('charts')
 def get_analytics_charts():
     """Get chart data for analytics"""
     try:
         chart_type = request.args.get('type', 'inventory_trends')
-        chart_data = data_processor.generate_chart_data(chart_type)
+        chart_json = data_processor.get_chart_json(chart_type)
         
+        # The chart payload is already serialized, so splice it into the envelope
+        return app.response_class(
+            b'{"success": true, "data": ' + chart_json + b'}',
+            mimetype='application/json'
+        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/analytics/charts/batch')
+def get_analytics_charts_batch():
+    """Get several charts in one response, revalidated with an ETag"""
+    try:
+        chart_types = [t for value in request.args.getlist('types') for t in value.split(',') if t]
+        if not chart_types or len(chart_types) > Config.CHART_BATCH_MAX:
+            return jsonify({
+                'success': False,
+                'error': f"Pass between 1 and {Config.CHART_BATCH_MAX} chart types in 'types'"
+            }), 400
+        
+        body = b'{"success": true, "data": ' + data_processor.get_charts_json(chart_types) + b'}'
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Expose request, query, WMS and processing timings in the Prometheus text format"""
+    return app.response_class(perf.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/debug/perf')
+def get_perf_stats():
+    """Get p50/p95/p99 latencies per operation and the slow query log (kind=http|db|wms|processor)"""
+    try:
         return jsonify({
             'success': True,
-            'data': chart_data
+            'data': perf.snapshot(request.args.get('kind'))
         })
     except Exception as e:
         return jsonify({
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+WMS ingest throughput benchmark
+
+Serves a synthetic inventory from the stub WMS on a local port and measures
+each stage of a sync in records per second:
+
+- fetch: one get_data request over the socket client, as JSON and as msgpack
+- normalize: DataProcessor's per-record path against the columnar path, each
+  followed by watermark collection and building the bulk write tuples
+
+It also times many small requests sent on a new socket each, on one pooled
+connection, and pipelined with request_many.
+"""
+
+import argparse
+import threading
+import time
+
+from services.data_processor import DataProcessor
+from services.database import _column_rows
+from services.socket_client import WMSSocketClient, msgpack
+from services.sync_state import SyncState
+from stub_wms import StubWMSServer, generate_dataset
+
+
+def rate(count, seconds):
+    """Format a throughput in records per second"""
+    return f"{count / seconds / 1000:,.0f}k rec/s" if seconds else 'n/a'
+
+
+def best_time(function, repeat):
+    """Result of the last call and best wall time in seconds over repeat calls"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def bench_fetch(address, count, repeat):
+    """get_data throughput for each available frame encoding"""
+    encodings = ['json'] + (['msgpack'] if msgpack is not None else [])
+    results = {}
+    for encoding in encodings:
+        client = WMSSocketClient(*address, timeout=300, encoding=encoding)
+        try:
+            client.request({'action': 'ping'})
+            response, seconds = best_time(lambda: client.request({'action': 'get_data'}), repeat)
+        finally:
+            client.close()
+        if len(response['inventory']) != count:
+            raise SystemExit(f"Expected {count} records over {encoding}, got {len(response['inventory'])}")
+        results[encoding] = (seconds, response['inventory'])
+    return results
+
+
+def bench_normalize(processor, records, repeat):
+    """Per-record and columnar normalization, watermarks and write tuples"""
+    def run(normalize):
+        processed = normalize(records)
+        SyncState().collect({'inventory': processed})
+        return list(_column_rows(processed, ['sku', 'current_stock']))
+
+    per_record = best_time(lambda: run(processor._process_inventory_data), repeat)[1]
+    columnar = best_time(lambda: run(lambda batch: processor._process_columnar('inventory', batch)), repeat)[1]
+    return per_record, columnar
+
+
+def bench_requests(address, requests):
+    """Seconds for many pings on a new socket each, on one pooled connection, and pipelined"""
+    ping = {'action': 'ping'}
+
+    client = WMSSocketClient(*address, pool_size=0)
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.request(ping)
+    unpooled = time.perf_counter() - started
+
+    client = WMSSocketClient(*address)
+    client.request(ping)
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.request(ping)
+    pooled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    client.request_many([ping] * requests)
+    pipelined = time.perf_counter() - started
+    client.close()
+    return unpooled, pooled, pipelined
+
+
+def main():
+    """Run the benchmark from the command line"""
+    parser = argparse.ArgumentParser(description='WMS ingest throughput benchmark')
+    parser.add_argument('--records', nargs='+', type=int, default=[10_000, 100_000, 1_000_000],
+                        help='inventory records served per run')
+    parser.add_argument('--requests', type=int, default=500, help='pings for the request benchmark')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    processor = DataProcessor()
+    server = StubWMSServer(('127.0.0.1', 0), generate_dataset(0, 0, 0))
+    threading.Thread(target=server.serve_forever, name='stub-wms', daemon=True).start()
+    address = server.server_address
+
+    try:
+        unpooled, pooled, pipelined = bench_requests(address, args.requests)
+        print(f"{args.requests} pings: new socket {unpooled * 1000:.0f} ms, "
+              f"pooled {pooled * 1000:.0f} ms, pipelined {pipelined * 1000:.0f} ms")
+        print()
+
+        print(f"{'records':>10} {'fetch json':>16} {'fetch msgpack':>16} {'per-record':>16} {'columnar':>16}")
+        for count in args.records:
+            server.dataset = generate_dataset(count, 0, 0)
+            fetched = bench_fetch(address, count, args.repeat)
+            per_record, columnar = bench_normalize(processor, fetched['json'][1], args.repeat)
+            msgpack_rate = rate(count, fetched['msgpack'][0]) if 'msgpack' in fetched else 'n/a'
+            print(f"{count:>10} {rate(count, fetched['json'][0]):>16} {msgpack_rate:>16} "
+                  f"{rate(count, per_record):>16} {rate(count, columnar):>16}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
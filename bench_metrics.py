@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Warehouse metrics query benchmark
+
+Times the old cross-joined metrics query against the current per-table
+aggregate query on a synthetic warehouse held in an in-memory SQLite database,
+so it runs without SQL Server. The queries are the ones in
+DatabaseService.query_warehouse_metrics with the T-SQL date functions replaced
+by their SQLite equivalents. The cross join returns orders x inventory x
+locations rows, so it is skipped once that product exceeds --max-cross-rows.
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+# The original query: every KPI over the orders x inventory x locations product
+CROSS_JOIN_QUERY = """
+SELECT
+    COUNT(DISTINCT o.id) as total_orders,
+    COUNT(CASE WHEN o.status IN ('packed', 'shipped') THEN 1 END) as orders_processed,
+    COUNT(CASE WHEN o.status = 'shipped' THEN 1 END) as orders_shipped,
+    SUM(i.current_stock * i.unit_cost) as inventory_value,
+    COUNT(CASE WHEN i.current_stock <= i.min_stock THEN 1 END) as low_stock_items,
+    AVG(CASE WHEN l.capacity > 0 THEN (l.occupied * 100.0 / l.capacity) ELSE 0 END) as utilization_rate
+FROM orders o
+CROSS JOIN inventory i
+CROSS JOIN locations l
+WHERE o.order_date >= datetime('now', '-1 month')
+"""
+
+# The current query: each KPI aggregated over its own table, single rows combined
+PER_TABLE_QUERY = """
+WITH order_stats AS (
+    SELECT
+        COUNT(*) as total_orders,
+        COUNT(CASE WHEN o.status IN ('packed', 'shipped') THEN 1 END) as orders_processed,
+        COUNT(CASE WHEN o.status = 'shipped' THEN 1 END) as orders_shipped,
+        COUNT(CASE WHEN o.status = 'shipped'
+                   AND (strftime('%s', o.last_updated) - strftime('%s', o.order_date)) / 3600 <= ?
+                   THEN 1 END) as orders_shipped_on_time
+    FROM orders o
+    WHERE o.order_date >= datetime('now', '-1 month')
+),
+pick_stats AS (
+    SELECT
+        SUM(oi.picked_quantity) as units_picked,
+        SUM(oi.quantity) as units_to_pick
+    FROM order_items oi
+    JOIN orders o ON o.id = oi.order_id
+    WHERE o.order_date >= datetime('now', '-1 month')
+      AND o.status IN ('processing', 'packed', 'shipped')
+),
+inventory_stats AS (
+    SELECT
+        SUM(i.current_stock * i.unit_cost) as inventory_value,
+        SUM(i.current_stock) as inventory_units,
+        COUNT(CASE WHEN i.current_stock <= i.min_stock THEN 1 END) as low_stock_items
+    FROM inventory i
+),
+location_stats AS (
+    SELECT
+        AVG(CASE WHEN l.capacity > 0 THEN (l.occupied * 100.0 / l.capacity) ELSE 0 END) as utilization_rate
+    FROM locations l
+),
+transaction_stats AS (
+    SELECT
+        COUNT(*) as pick_count,
+        SUM(t.quantity) as units_picked_30d,
+        (strftime('%s', MAX(t.timestamp)) - strftime('%s', MIN(t.timestamp))) / 60.0 as pick_span_minutes
+    FROM transactions t
+    WHERE t.type = 'pick'
+      AND t.timestamp >= datetime('now', '-30 days')
+)
+SELECT *
+FROM order_stats os
+CROSS JOIN pick_stats ps
+CROSS JOIN inventory_stats ist
+CROSS JOIN location_stats ls
+CROSS JOIN transaction_stats ts
+"""
+
+SCHEMA = """
+CREATE TABLE orders (id INTEGER PRIMARY KEY, order_number TEXT, status TEXT,
+                     order_date TEXT, last_updated TEXT);
+CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER, sku TEXT,
+                          quantity INTEGER, picked_quantity INTEGER);
+CREATE TABLE inventory (id INTEGER PRIMARY KEY, sku TEXT, current_stock INTEGER,
+                        min_stock INTEGER, unit_cost REAL);
+CREATE TABLE locations (id INTEGER PRIMARY KEY, zone TEXT, capacity INTEGER, occupied INTEGER);
+CREATE TABLE transactions (id INTEGER PRIMARY KEY, type TEXT, sku TEXT, quantity INTEGER,
+                           timestamp TEXT);
+CREATE INDEX ix_order_items_order ON order_items (order_id);
+"""
+
+
+def _timestamp(value):
+    """SQLite's datetime('now') text format"""
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build_database(orders, skus, locations, items_per_order=3, transactions=None):
+    """Create an in-memory warehouse with the given table sizes"""
+    rng = random.Random(42)
+    # datetime('now') is UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    statuses = ['pending', 'processing', 'packed', 'shipped']
+    transactions = orders * items_per_order if transactions is None else transactions
+
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(SCHEMA)
+    order_rows = []
+    for i in range(orders):
+        ordered = now - timedelta(minutes=rng.randrange(60 * 24 * 45))
+        order_rows.append((i, f'ORD-{i:07d}', statuses[i % len(statuses)], _timestamp(ordered),
+                           _timestamp(ordered + timedelta(hours=rng.randrange(96)))))
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?, ?)", order_rows)
+    conn.executemany(
+        "INSERT INTO order_items (order_id, sku, quantity, picked_quantity) VALUES (?, ?, ?, ?)",
+        ((i // items_per_order, f'SKU-{rng.randrange(max(skus, 1)):06d}', 10, rng.randint(0, 10))
+         for i in range(orders * items_per_order))
+    )
+    conn.executemany(
+        "INSERT INTO inventory VALUES (?, ?, ?, ?, ?)",
+        ((i, f'SKU-{i:06d}', rng.randint(0, 1000), 50, round(rng.uniform(1, 100), 2)) for i in range(skus))
+    )
+    conn.executemany(
+        "INSERT INTO locations VALUES (?, ?, ?, ?)",
+        ((i, 'ABCDE'[i % 5], 100, rng.randint(0, 100)) for i in range(locations))
+    )
+    conn.executemany(
+        "INSERT INTO transactions (type, sku, quantity, timestamp) VALUES (?, ?, ?, ?)",
+        (('pick' if i % 3 else 'receive', f'SKU-{rng.randrange(max(skus, 1)):06d}', rng.randint(1, 20),
+          _timestamp(now - timedelta(seconds=i * 30))) for i in range(transactions))
+    )
+    conn.commit()
+    return conn
+
+
+def time_query(conn, query, params=(), repeat=3):
+    """Best wall time in seconds of running a query and fetching its row"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parse_scale(text):
+    """Parse an ORDERSxSKUSxLOCATIONS scale such as 50000x20000x10000"""
+    orders, skus, locations = (int(part) for part in text.lower().split('x'))
+    return orders, skus, locations
+
+
+def main():
+    """Run the benchmark from the command line"""
+    parser = argparse.ArgumentParser(description='Warehouse metrics query benchmark')
+    parser.add_argument('--scales', nargs='+', type=parse_scale,
+                        default=[(50, 20, 10), (200, 80, 40), (500, 200, 100), (5000, 2000, 1000),
+                                 (50000, 20000, 10000)],
+                        help='table sizes as ORDERSxSKUSxLOCATIONS')
+    parser.add_argument('--max-cross-rows', type=int, default=20_000_000,
+                        help='skip the cross join above this many joined rows')
+    parser.add_argument('--sla-hours', type=int, default=48)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'orders x skus x locations':>28} {'cross join':>12} {'per table':>12}")
+    for orders, skus, locations in args.scales:
+        conn = build_database(orders, skus, locations)
+        if orders * skus * locations <= args.max_cross_rows:
+            cross = f"{time_query(conn, CROSS_JOIN_QUERY, repeat=args.repeat) * 1000:.1f} ms"
+        else:
+            cross = 'skipped'
+        per_table = time_query(conn, PER_TABLE_QUERY, (args.sla_hours,), args.repeat)
+        conn.close()
+        print(f"{f'{orders} x {skus} x {locations}':>28} {cross:>12} {per_table * 1000:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
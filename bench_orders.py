@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Order nesting microbenchmark
+
+Times how get_orders_data turns joined order/item lines into nested orders:
+the original pandas groupby plus iterrows path against the single-pass
+_nest_order_lines. Both start from the row tuples a cursor returns, so the old
+path includes building the DataFrame that pd.read_sql used to build. The old
+path is skipped above --old-max-lines since it grows to minutes.
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pandas as pd
+
+from services.database import _nest_order_lines
+
+COLUMNS = ['id', 'order_number', 'customer', 'status', 'priority', 'order_date', 'total_value',
+           'sku', 'item_name', 'quantity', 'picked_quantity', 'unit_price']
+
+
+def generate_lines(count, items_per_order=5):
+    """Build joined order/item rows as pyodbc returns them, newest order first"""
+    rng = random.Random(42)
+    now = datetime.now()
+    statuses = ['pending', 'processing', 'packed', 'shipped']
+    priorities = ['low', 'normal', 'high']
+    lines = []
+    order_id = count // items_per_order + 1
+    while len(lines) < count:
+        order_id -= 1
+        order = (order_id, f'ORD-{order_id:07d}', f'Customer {order_id % 500}', statuses[order_id % 4],
+                 priorities[order_id % 3], now - timedelta(minutes=len(lines)),
+                 Decimal(rng.randint(1000, 100000)) / 100)
+        # Orders without items come back as one line of NULL item columns
+        if order_id % 50 == 0:
+            lines.append(order + (None, None, None, None, None))
+            continue
+        for _ in range(min(items_per_order, count - len(lines))):
+            sku = rng.randrange(100000)
+            lines.append(order + (f'SKU-{sku:06d}', f'Item {sku}', rng.randint(1, 20), rng.randint(0, 20),
+                                  Decimal(rng.randint(100, 10000)) / 100))
+    return lines
+
+
+def nest_with_groupby(lines):
+    """The original nesting: read into a DataFrame, then groupby and iterrows"""
+    df = pd.DataFrame.from_records(lines, columns=COLUMNS)
+    orders = []
+    for order_id, group in df.groupby('id', sort=False):
+        order_data = group.iloc[0]
+        items = []
+
+        for _, item in group.iterrows():
+            if pd.notna(item['sku']):
+                items.append({
+                    'sku': item['sku'],
+                    'name': item['item_name'],
+                    'quantity': item['quantity'],
+                    'picked_quantity': item['picked_quantity'],
+                    'unit_price': item['unit_price']
+                })
+
+        orders.append({
+            'id': order_data['id'],
+            'order_number': order_data['order_number'],
+            'customer': order_data['customer'],
+            'status': order_data['status'],
+            'priority': order_data['priority'],
+            'order_date': order_data['order_date'].isoformat() if pd.notna(order_data['order_date']) else None,
+            'total_value': order_data['total_value'],
+            'items': items
+        })
+
+    return orders
+
+
+def as_json(orders):
+    """Orders as jsonify would see them, with every number as a float"""
+    return json.loads(json.dumps(orders, default=float))
+
+
+def timed(function, lines):
+    """Result and wall time in seconds of one call"""
+    started = time.perf_counter()
+    result = function(lines)
+    return result, time.perf_counter() - started
+
+
+def main():
+    """Run the benchmark from the command line"""
+    parser = argparse.ArgumentParser(description='Order nesting microbenchmark')
+    parser.add_argument('--lines', nargs='+', type=int, default=[10_000, 100_000, 1_000_000],
+                        help='joined order/item lines per run')
+    parser.add_argument('--items-per-order', type=int, default=5)
+    parser.add_argument('--old-max-lines', type=int, default=100_000,
+                        help='skip the groupby path above this many lines')
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'orders':>9} {'groupby':>10} {'single pass':>12} {'speedup':>8}")
+    for count in args.lines:
+        lines = generate_lines(count, args.items_per_order)
+        nested, new_seconds = timed(_nest_order_lines, lines)
+        if count <= args.old_max_lines:
+            grouped, old_seconds = timed(nest_with_groupby, lines)
+            if as_json(grouped) != as_json(nested):
+                raise SystemExit(f"Nested orders differ from the groupby path at {count} lines")
+            old = f"{old_seconds:.3f} s"
+            speedup = f"{old_seconds / new_seconds:.0f}x"
+        else:
+            old = speedup = 'skipped'
+        print(f"{count:>10} {len(nested):>9} {old:>10} {new_seconds:>10.3f} s {speedup:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,14 +20,93 @@ class Config:
         f"?driver={DB_DRIVER.replace(' ', '+')}"
     )
     
+    # Database Connection Pool Configuration
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+    DB_POOL_IDLE_TIMEOUT = float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300))  # close connections idle longer than this
+    DB_POOL_HEALTH_CHECK = os.environ.get('DB_POOL_HEALTH_CHECK', 'True').lower() == 'true'
+    DB_FETCH_SIZE = int(os.environ.get('DB_FETCH_SIZE', 5000))  # rows per cursor.fetchmany() call
+    DB_WRITE_BATCH_SIZE = int(os.environ.get('DB_WRITE_BATCH_SIZE', 1000))  # rows per bulk insert batch
+    
     # C WMS Application Configuration
     WMS_APP_HOST = os.environ.get('WMS_APP_HOST') or 'localhost'
     WMS_APP_PORT = os.environ.get('WMS_APP_PORT') or '8080'
     WMS_API_KEY = os.environ.get('WMS_API_KEY') or 'your_wms_api_key'
+    WMS_HTTP_TIMEOUT = float(os.environ.get('WMS_HTTP_TIMEOUT', 10))  # seconds per request
+    WMS_HTTP_POOL_SIZE = int(os.environ.get('WMS_HTTP_POOL_SIZE', 10))  # keep-alive connections
+    WMS_SOCKET_TIMEOUT = float(os.environ.get('WMS_SOCKET_TIMEOUT', 10))  # seconds
+    WMS_SOCKET_POOL_SIZE = int(os.environ.get('WMS_SOCKET_POOL_SIZE', 4))  # idle persistent connections kept
+    WMS_SOCKET_IDLE_TIMEOUT = float(os.environ.get('WMS_SOCKET_IDLE_TIMEOUT', 60))
+    WMS_SOCKET_ENCODING = os.environ.get('WMS_SOCKET_ENCODING', 'json')  # 'json' or 'msgpack'
+    WMS_COMMAND_BATCH_SIZE = int(os.environ.get('WMS_COMMAND_BATCH_SIZE', 100))  # commands per request
+    WMS_COMMAND_QUEUE_SIZE = int(os.environ.get('WMS_COMMAND_QUEUE_SIZE', 1000))  # queued commands before submit blocks
+    WMS_COMMAND_LINGER = float(os.environ.get('WMS_COMMAND_LINGER', 0.05))  # seconds to wait for a fuller batch
+    WMS_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('WMS_BREAKER_FAILURE_THRESHOLD', 3))  # failures before a transport is skipped
+    WMS_BREAKER_RESET_TIMEOUT = float(os.environ.get('WMS_BREAKER_RESET_TIMEOUT', 30))  # seconds before a skipped transport is probed
+    WMS_STREAM_CHUNK_SIZE = int(os.environ.get('WMS_STREAM_CHUNK_SIZE', 64 * 1024))  # bytes read per chunk
+    WMS_STREAM_BATCH_SIZE = int(os.environ.get('WMS_STREAM_BATCH_SIZE', 5000))  # records per processing batch
+    WMS_FILE_WATCH_ENABLED = os.environ.get('WMS_FILE_WATCH_ENABLED', 'False').lower() == 'true'
+    WMS_FILE_WATCH_INTERVAL = float(os.environ.get('WMS_FILE_WATCH_INTERVAL', 1.0))  # seconds between stat polls
+    WMS_FILE_SETTLE_TIME = float(os.environ.get('WMS_FILE_SETTLE_TIME', 2.0))  # seconds a file must be unchanged before it is read
     
     # Data Processing Configuration
     SYNC_INTERVAL = int(os.environ.get('SYNC_INTERVAL', 300))  # 5 minutes
     MAX_RECORDS_PER_SYNC = int(os.environ.get('MAX_RECORDS_PER_SYNC', 10000))
+    SYNC_MODE = os.environ.get('SYNC_MODE', 'incremental')  # 'incremental' or 'full'
+    SYNC_STATE_FILE = os.environ.get('SYNC_STATE_FILE', 'sync_state.json')  # high-water marks
+    SYNC_SCHEDULER_ENABLED = os.environ.get('SYNC_SCHEDULER_ENABLED', 'True').lower() == 'true'
+    SYNC_JITTER = float(os.environ.get('SYNC_JITTER', 0.1))  # +/- fraction applied to each interval
+    SYNC_RETRY_DELAY = int(os.environ.get('SYNC_RETRY_DELAY', 30))  # first backoff after a failed sync
+    SYNC_MAX_BACKOFF = int(os.environ.get('SYNC_MAX_BACKOFF', 3600))
+    COLUMNAR_MIN_ROWS = int(os.environ.get('COLUMNAR_MIN_ROWS', 1000))  # batch size that switches to vectorized processing
+    REJECT_LOG_SIZE = int(os.environ.get('REJECT_LOG_SIZE', 1000))  # rejected records kept for inspection
+    CHART_BUILD_WORKERS = int(os.environ.get('CHART_BUILD_WORKERS', 4))  # charts built in parallel by the batch endpoint
+    CHART_BATCH_MAX = int(os.environ.get('CHART_BATCH_MAX', 10))  # chart types accepted per batch request
+    
+    # Response Cache Configuration
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'True').lower() == 'true'
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_TTLS = {  # seconds, per endpoint
+        'metrics': int(os.environ.get('CACHE_TTL_METRICS', 30)),
+        'inventory': int(os.environ.get('CACHE_TTL_INVENTORY', 60)),
+        'orders': int(os.environ.get('CACHE_TTL_ORDERS', 30)),
+        'locations': int(os.environ.get('CACHE_TTL_LOCATIONS', 300)),
+        'charts': int(os.environ.get('CACHE_TTL_CHARTS', 300)),
+        'trends': int(os.environ.get('CACHE_TTL_TRENDS', 300))
+    }
+    
+    # API Pagination Configuration
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+    
+    # Inventory Search Configuration
+    SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 50))  # results of a search without limit
+    SEARCH_INDEX_MAX_AGE = int(os.environ.get('SEARCH_INDEX_MAX_AGE', 900))  # seconds before a sync rebuilds the index
+    
+    # Metric Snapshot Configuration
+    METRICS_DB_PATH = os.environ.get('METRICS_DB_PATH', 'metrics.db')  # local SQLite file of metric snapshots
+    METRICS_RETENTION_DAYS = int(os.environ.get('METRICS_RETENTION_DAYS', 90))
+    DELIVERY_SLA_HOURS = int(os.environ.get('DELIVERY_SLA_HOURS', 48))  # order-to-ship time counted as on time
+    TREND_DAILY_RETENTION_DAYS = int(os.environ.get('TREND_DAILY_RETENTION_DAYS', 365))
+    TREND_HOURLY_RETENTION_DAYS = int(os.environ.get('TREND_HOURLY_RETENTION_DAYS', 14))
+    TREND_CHART_DAYS = int(os.environ.get('TREND_CHART_DAYS', 15))  # range of the dashboard trends chart
+    TREND_CHART_SKUS = int(os.environ.get('TREND_CHART_SKUS', 5))  # most-moved SKUs plotted on the dashboard
+    
+    # Table Snapshot Configuration (requires pyarrow)
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'snapshots')  # Arrow files of the warehouse tables
+    SNAPSHOT_TRANSACTION_DAYS = int(os.environ.get('SNAPSHOT_TRANSACTION_DAYS', 31))  # transaction history copied per sync
+    
+    # Dashboard Event Stream Configuration
+    SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 100))  # each open stream holds a server thread
+    SSE_KEEPALIVE = int(os.environ.get('SSE_KEEPALIVE', 15))  # seconds between keepalive comments
+    SSE_DELTA_LIMIT = int(os.environ.get('SSE_DELTA_LIMIT', 500))  # changed records pushed per entity per sync
+    
+    # Performance Instrumentation Configuration
+    PERF_ENABLED = os.environ.get('PERF_ENABLED', 'True').lower() == 'true'
+    PERF_SAMPLE_SIZE = int(os.environ.get('PERF_SAMPLE_SIZE', 1024))  # recent timings per operation behind p50/p95/p99
+    PERF_SLOW_QUERY_MS = int(os.environ.get('PERF_SLOW_QUERY_MS', 500))  # statements logged with their SQL text
+    PERF_SLOW_LOG_SIZE = int(os.environ.get('PERF_SLOW_LOG_SIZE', 100))
     
     # Application Settings
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
@@ -10,7 +10,8 @@ for development and production environments.
 import os
 import sys
 import logging
-from app import app
+from app import app, db_service, sync_scheduler, file_watcher
+from config import Config
 
 def setup_logging():
     """Configure logging for the application"""
@@ -35,6 +36,15 @@ def main():
     logging.info(f"Starting WMS Data Visualization Tool on {host}:{port}")
     logging.info(f"Debug mode: {debug}")
     
+    # With the debug reloader only the child process serves requests
+    serving = not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    if serving:
+        db_service.start_search_index_build()
+    if Config.SYNC_SCHEDULER_ENABLED and serving:
+        sync_scheduler.start()
+    if Config.WMS_FILE_WATCH_ENABLED and serving:
+        file_watcher.start()
+    
     try:
         app.run(
             host=host,
@@ -0,0 +1,89 @@
+import logging
+
+_STRING_TYPES = ('CHAR', 'VARCHAR', 'NCHAR', 'NVARCHAR')
+
+
+def _column_type(sql_type):
+    """Staging column type, with string columns in the database's collation.
+
+    Temp tables otherwise take tempdb's collation, and joining or comparing
+    them with the target table fails with a collation conflict.
+    """
+    if sql_type.split('(')[0].strip().upper() in _STRING_TYPES:
+        return f"{sql_type} COLLATE DATABASE_DEFAULT"
+    return sql_type
+
+
+class BulkWriter:
+    """Set-based writer that stages rows in a temp table and applies them in one statement"""
+
+    def __init__(self, conn, batch_size=1000):
+        self.logger = logging.getLogger(__name__)
+        self.conn = conn
+        self.batch_size = max(1, int(batch_size))
+
+    def update(self, table, key, columns, rows, touch_column=None, touch_source=None):
+        """Update existing rows of a table from (key, *values) tuples.
+
+        ``key`` and ``columns`` are (name, sql_type) pairs describing the staging
+        table. Later rows win when a key appears more than once, matching the
+        previous row-by-row behaviour. Only rows where a column value differs
+        are written, and only those get ``touch_column`` set. That time is
+        GETDATE(), or the row's trailing ``touch_source`` value, a (name,
+        sql_type) pair, when it is not NULL. Returns the number of target rows
+        changed.
+        """
+        key_name, key_type = key
+        staged = {}
+        for row in rows:
+            if row[0] is not None:
+                staged[row[0]] = row
+        if not staged:
+            return 0
+
+        stage = f"#stage_{table}"
+        compared = [name for name, _ in columns]
+        staged_columns = list(columns) + ([touch_source] if touch_source else [])
+        column_names = [name for name, _ in staged_columns]
+        column_defs = ", ".join(f"{name} {_column_type(sql_type)}" for name, sql_type in staged_columns)
+        placeholders = ", ".join("?" for _ in range(len(staged_columns) + 1))
+        assignments = [f"t.{name} = s.{name}" for name in compared]
+        if touch_column and touch_source:
+            assignments.append(f"t.{touch_column} = COALESCE(s.{touch_source[0]}, GETDATE())")
+        elif touch_column:
+            assignments.append(f"t.{touch_column} = GETDATE()")
+        # NULL-safe "value differs" test, so unchanged rows keep their touch time
+        changed = " OR ".join(
+            f"(t.{name} <> s.{name} OR (t.{name} IS NULL AND s.{name} IS NOT NULL)"
+            f" OR (t.{name} IS NOT NULL AND s.{name} IS NULL))"
+            for name in compared
+        )
+
+        cursor = self.conn.cursor()
+        cursor.fast_executemany = True
+        try:
+            cursor.execute(f"IF OBJECT_ID('tempdb..{stage}') IS NOT NULL DROP TABLE {stage}")
+            cursor.execute(
+                f"CREATE TABLE {stage} ({key_name} {_column_type(key_type)} NOT NULL PRIMARY KEY, {column_defs})"
+            )
+
+            insert_sql = (
+                f"INSERT INTO {stage} ({key_name}, {', '.join(column_names)}) "
+                f"VALUES ({placeholders})"
+            )
+            values = list(staged.values())
+            for start in range(0, len(values), self.batch_size):
+                cursor.executemany(insert_sql, values[start:start + self.batch_size])
+
+            cursor.execute(
+                f"UPDATE t SET {', '.join(assignments)} "
+                f"FROM {table} t INNER JOIN {stage} s ON t.{key_name} = s.{key_name} "
+                f"WHERE {changed}"
+            )
+            affected = cursor.rowcount
+            cursor.execute(f"DROP TABLE {stage}")
+        finally:
+            cursor.close()
+
+        self.logger.debug(f"Bulk updated {affected} changed of {len(staged)} staged rows in {table}")
+        return affected
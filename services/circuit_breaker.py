@@ -0,0 +1,86 @@
+import threading
+import time
+import logging
+from datetime import datetime
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Tracks the health of one WMS transport.
+
+    After failure_threshold consecutive failures the circuit opens and callers
+    skip the transport. Once reset_timeout seconds have passed a single probe
+    call is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._last_error = None
+        self._last_failure = None
+        self._last_success = None
+        self._last_latency = None
+
+    def allow(self):
+        """Whether a call may go to this transport now; every True must be followed by record_*"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self.logger.info(f"Circuit for {self.name} half-open; probing")
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency=None):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            if self._state != CLOSED:
+                self.logger.info(f"Circuit for {self.name} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._last_success = datetime.now().isoformat()
+            self._last_latency = None if latency is None else round(latency, 4)
+
+    def record_failure(self, error=None):
+        """Count a failed call, opening the circuit at the threshold or after a failed probe"""
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error else None
+            self._last_failure = datetime.now().isoformat()
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def status(self):
+        """Get the breaker state for the integration status endpoint"""
+        with self._lock:
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'retry_in': retry_in,
+                'last_error': self._last_error,
+                'last_failure': self._last_failure,
+                'last_success': self._last_success,
+                'last_latency': self._last_latency
+            }
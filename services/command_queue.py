@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+
+class CommandQueue:
+    """Bounded queue that coalesces submitted WMS commands into batches.
+
+    ``send_batch(commands)`` receives a list of command dicts and must return
+    one result per command, in order.
+    """
+
+    def __init__(self, send_batch, maxsize=1000, batch_size=100, linger=0.05):
+        self.logger = logging.getLogger(__name__)
+        self._send_batch = send_batch
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, command, parameters=None, timeout=None):
+        """Queue a command and return a Future for its result.
+
+        Blocks for up to timeout seconds while the queue is full, then raises
+        queue.Full.
+        """
+        future = Future()
+        self._queue.put(({'command': command, 'parameters': parameters or {}}, future), timeout=timeout)
+        self._ensure_worker()
+        return future
+
+    def pending(self):
+        """Number of commands waiting to be sent"""
+        return self._queue.qsize()
+
+    def _ensure_worker(self):
+        """Start the sender thread on first use"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='wms-commands', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        """Drain the queue in batches, waiting briefly for more commands to coalesce"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            commands = [command for command, _ in batch]
+            try:
+                results = self._send_batch(commands)
+            except Exception as e:
+                self.logger.error(f"Command batch failed: {e}")
+                results = [{'command': c['command'], 'success': False, 'error': str(e)} for c in commands]
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
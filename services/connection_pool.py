@@ -0,0 +1,191 @@
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable DB-API connections"""
+
+    def __init__(self, connect, max_size=10, idle_timeout=300, borrow_timeout=30,
+                 health_check=True, health_check_query="SELECT 1"):
+        self.logger = logging.getLogger(__name__)
+        self._connect = connect
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = idle_timeout
+        self.borrow_timeout = borrow_timeout
+        self.health_check = health_check
+        self.health_check_query = health_check_query
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()  # (connection, returned_at) pairs, most recent last
+        self._size = 0
+        self._in_use = 0
+
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'closed_idle': 0,
+            'failed_health_checks': 0,
+            'exhausted_waits': 0,
+            'exhausted_timeouts': 0,
+            'wait_time_total': 0.0
+        }
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, committing on success and rolling back on error"""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def acquire(self):
+        """Borrow a healthy connection from the pool, opening one if allowed"""
+        deadline = time.monotonic() + self.borrow_timeout
+        waited = False
+
+        while True:
+            conn = None
+            expired = []
+            create = False
+
+            with self._available:
+                while True:
+                    expired.extend(self._evict_expired())
+                    if self._idle:
+                        # Most recently returned first, so the rest can age out
+                        conn, _ = self._idle.pop()
+                        self._in_use += 1
+                        break
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        self._in_use += 1
+                        create = True
+                        break
+
+                    if not waited:
+                        waited = True
+                        self._stats['exhausted_waits'] += 1
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['exhausted_timeouts'] += 1
+                        self._close_all(expired)
+                        raise PoolExhaustedError(
+                            f"No database connection available after {self.borrow_timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    started = time.monotonic()
+                    self._available.wait(remaining)
+                    self._stats['wait_time_total'] += time.monotonic() - started
+
+            self._close_all(expired)
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    raise
+                with self._lock:
+                    self._stats['created'] += 1
+                return conn
+
+            if self._is_healthy(conn):
+                with self._lock:
+                    self._stats['reused'] += 1
+                return conn
+
+            self.logger.warning("Discarding pooled database connection that failed health check")
+            with self._lock:
+                self._stats['failed_health_checks'] += 1
+            self.release(conn, discard=True)
+
+    def release(self, conn, discard=False):
+        """Return a borrowed connection to the pool, or close it if discarded"""
+        with self._available:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            expired = self._evict_expired()
+            self._available.notify()
+
+        self._close_all(expired + ([conn] if discard else []))
+
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use
+            })
+        stats['wait_time_total'] = round(stats['wait_time_total'], 4)
+        return stats
+
+    def close(self):
+        """Close every idle connection held by the pool"""
+        with self._available:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        self._close_all(idle)
+
+    def _evict_expired(self):
+        """Remove idle connections past the idle timeout; the caller holds the lock and closes them"""
+        expired = []
+        if not self.idle_timeout:
+            return expired
+        now = time.monotonic()
+        # Oldest first; stop at the first connection still within the timeout
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+            self._stats['closed_idle'] += 1
+        return expired
+
+    def _is_healthy(self, conn):
+        """Run the health check query on a connection taken from the idle set"""
+        if not self.health_check:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            self.logger.debug(f"Connection health check failed: {e}")
+            return False
+
+    def _close_all(self, connections):
+        """Close connections, ignoring errors from already broken ones"""
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
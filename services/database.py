@@ -1,14 +1,167 @@
 import pyodbc
 import pandas as pd
+import base64
+import json
 from datetime import datetime, timedelta
+from decimal import Decimal
 from config import Config
+from services.connection_pool import ConnectionPool
+from services.bulk_writer import BulkWriter
+from services.search_index import InventorySearchIndex
+from services.perf import ProfiledConnection, recorder as perf
+import threading
 import logging
 
+# Export table -> (columns, order by, {filter argument: (condition, converter)})
+EXPORT_TABLES = {
+    'inventory': (
+        ['id', 'sku', 'name', 'category', 'current_stock', 'min_stock', 'max_stock',
+         'location', 'last_updated', 'unit_cost', 'supplier'],
+        'id',
+        {'category': ('category = ?', str)}
+    ),
+    'orders': (
+        ['id', 'order_number', 'customer', 'status', 'priority', 'order_date', 'total_value', 'last_updated'],
+        'id',
+        {'status': ('status = ?', str), 'priority': ('priority = ?', str)}
+    ),
+    'order_items': (
+        ['order_id', 'sku', 'item_name', 'quantity', 'picked_quantity', 'unit_price'],
+        'order_id',
+        {'sku': ('sku = ?', str)}
+    ),
+    'locations': (
+        ['zone', 'aisle', 'rack', 'shelf', 'capacity', 'occupied'],
+        'zone, aisle, rack, shelf',
+        {'zone': ('zone = ?', str)}
+    ),
+    'transactions': (
+        ['transaction_id', 'type', 'sku', 'quantity', 'timestamp'],
+        'timestamp',
+        {'sku': ('sku = ?', str), 'days': ('timestamp >= DATEADD(day, -?, GETDATE())', int)}
+    )
+}
+
+# Aggregates of query_warehouse_metrics served as they are by get_warehouse_metrics
+WAREHOUSE_METRICS = ['total_orders', 'orders_processed', 'orders_shipped',
+                     'inventory_value', 'low_stock_items', 'utilization_rate']
+
+
+def _encode_cursor(values):
+    """Encode the keyset values of the last row into an opaque cursor"""
+    raw = json.dumps(values, default=lambda v: v.item() if hasattr(v, 'item') else str(v))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def _column_rows(data, columns):
+    """Yield tuples of the given columns from a list of records or a columnar DataFrame batch"""
+    if isinstance(data, pd.DataFrame):
+        return zip(*(data[column].tolist() for column in columns))
+    return (tuple(record[column] for column in columns) for record in data)
+
+
+def _wms_time(value):
+    """WMS timestamp as a naive server-local datetime, like GETDATE(), or None"""
+    if isinstance(value, str) and value:
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime) or pd.isna(value):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _number(value):
+    """Decimal money columns as floats, which jsonify would otherwise send as strings"""
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _metric(value):
+    """An aggregate as a float, or None for a NULL or NaN from an empty table"""
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+def _percentage(part, whole):
+    """part / whole as a percentage rounded to one decimal, or None if undefined"""
+    part, whole = _metric(part), _metric(whole)
+    if part is None or not whole:
+        return None
+    return round(part / whole * 100, 1)
+
+
+def _nest_order_lines(rows):
+    """Nest joined order/item lines into orders in a single pass.
+
+    Relies on the query's ORDER BY keeping all lines of an order adjacent.
+    """
+    orders = []
+    current_id = object()
+    items = None
+    
+    for (order_id, order_number, customer, status, priority, order_date, total_value,
+         sku, item_name, quantity, picked_quantity, unit_price) in rows:
+        if order_id != current_id:
+            current_id = order_id
+            items = []
+            orders.append({
+                'id': order_id,
+                'order_number': order_number,
+                'customer': customer,
+                'status': status,
+                'priority': priority,
+                'order_date': order_date.isoformat() if order_date is not None else None,
+                'total_value': _number(total_value),
+                'items': items
+            })
+        
+        if sku is not None:
+            items.append({
+                'sku': sku,
+                'name': item_name,
+                'quantity': _number(quantity),
+                'picked_quantity': _number(picked_quantity),
+                'unit_price': _number(unit_price)
+            })
+    
+    return orders
+
+
 class DatabaseService:
     def __init__(self):
         self.config = Config()
         self.connection_string = self._build_connection_string()
         self.logger = logging.getLogger(__name__)
+        self.pool = ConnectionPool(
+            self._connect,
+            max_size=self.config.DB_POOL_SIZE,
+            idle_timeout=self.config.DB_POOL_IDLE_TIMEOUT,
+            borrow_timeout=self.config.DB_POOL_TIMEOUT,
+            health_check=self.config.DB_POOL_HEALTH_CHECK
+        )
+        
+        # Inventory search index, built at startup and refreshed by syncs;
+        # searches use SQL until it exists
+        self.search_index = None
+        self._search_lock = threading.Lock()
+        
+        # Set on a thread whose read fell back to mock data, so its response is not cached
+        self._fallback = threading.local()
     
     def _build_connection_string(self):
         """Build MS SQL Server connection string"""
@@ -21,14 +174,32 @@ class DatabaseService:
             "TrustServerCertificate=yes;"
         )
     
-    def get_connection(self):
-        """Get database connection"""
+    def _connect(self):
+        """Open a new physical database connection for the pool"""
         try:
-            return pyodbc.connect(self.connection_string)
+            conn = pyodbc.connect(self.connection_string)
+            # Every statement on a profiled connection is timed and slow ones logged
+            return ProfiledConnection(conn, perf) if perf.enabled else conn
         except Exception as e:
             self.logger.error(f"Database connection failed: {e}")
             raise
     
+    def get_connection(self):
+        """Borrow a pooled database connection for use in a with block"""
+        return self.pool.connection()
+    
+    def _iter_rows(self, cursor):
+        """Yield rows from an executed cursor, fetching DB_FETCH_SIZE rows at a time"""
+        while True:
+            rows = cursor.fetchmany(self.config.DB_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    
+    def get_pool_stats(self):
+        """Get connection pool usage and exhaustion metrics"""
+        return self.pool.stats()
+    
     def check_connection(self):
         """Check if database connection is working"""
         try:
@@ -40,39 +211,99 @@ class DatabaseService:
             return False
     
     def get_warehouse_metrics(self):
-        """Get warehouse performance metrics"""
-        query = """
-        SELECT 
-            COUNT(DISTINCT o.order_id) as total_orders,
-            COUNT(CASE WHEN o.status IN ('packed', 'shipped') THEN 1 END) as orders_processed,
-            COUNT(CASE WHEN o.status = 'shipped' THEN 1 END) as orders_shipped,
-            SUM(i.current_stock * i.unit_cost) as inventory_value,
-            COUNT(CASE WHEN i.current_stock <= i.min_stock THEN 1 END) as low_stock_items,
-            AVG(CASE WHEN l.capacity > 0 THEN (l.occupied * 100.0 / l.capacity) ELSE 0 END) as utilization_rate
-        FROM orders o
-        CROSS JOIN inventory i
-        CROSS JOIN locations l
-        WHERE o.order_date >= DATEADD(month, -1, GETDATE())
-        """
-        
+        """Get the warehouse metrics with picking and on-time KPIs, falling back to mock metrics if the query fails"""
         try:
-            with self.get_connection() as conn:
-                df = pd.read_sql(query, conn)
-                metrics = df.iloc[0].to_dict()
-                
-                # Add calculated metrics
-                metrics['picking_efficiency'] = 94.2  # This would come from picking data
-                metrics['on_time_delivery'] = 96.8    # This would come from delivery data
-                
-                return metrics
+            aggregates = self.query_warehouse_metrics()
         except Exception as e:
             self.logger.error(f"Error fetching metrics: {e}")
-            return self._get_mock_metrics()
+            return self._serve_mock(self._get_mock_metrics())
+        
+        metrics = {field: _metric(aggregates.get(field)) for field in WAREHOUSE_METRICS}
+        metrics['picking_efficiency'] = _percentage(aggregates.get('units_picked'), aggregates.get('units_to_pick'))
+        metrics['on_time_delivery'] = _percentage(aggregates.get('orders_shipped_on_time'),
+                                                  aggregates.get('orders_shipped'))
+        return metrics
     
-    def get_inventory_data(self, search='', category=''):
-        """Get inventory data with optional filtering"""
+    def query_warehouse_metrics(self):
+        """Aggregate the raw inputs of the warehouse metrics and KPIs; raises on failure"""
+        # Each KPI is aggregated over its own table so the cost stays linear in
+        # table size; the single-row results are then combined.
         query = """
-        SELECT 
+        WITH order_stats AS (
+            SELECT
+                COUNT(*) as total_orders,
+                COUNT(CASE WHEN o.status IN ('packed', 'shipped') THEN 1 END) as orders_processed,
+                COUNT(CASE WHEN o.status = 'shipped' THEN 1 END) as orders_shipped,
+                COUNT(CASE WHEN o.status = 'shipped'
+                           AND DATEDIFF(hour, o.order_date, o.last_updated) <= ? THEN 1 END) as orders_shipped_on_time
+            FROM orders o
+            WHERE o.order_date >= DATEADD(month, -1, GETDATE())
+        ),
+        pick_stats AS (
+            SELECT
+                SUM(oi.picked_quantity) as units_picked,
+                SUM(oi.quantity) as units_to_pick
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            WHERE o.order_date >= DATEADD(month, -1, GETDATE())
+              AND o.status IN ('processing', 'packed', 'shipped')
+        ),
+        inventory_stats AS (
+            SELECT
+                SUM(i.current_stock * i.unit_cost) as inventory_value,
+                SUM(i.current_stock) as inventory_units,
+                COUNT(CASE WHEN i.current_stock <= i.min_stock THEN 1 END) as low_stock_items
+            FROM inventory i
+        ),
+        location_stats AS (
+            SELECT
+                AVG(CASE WHEN l.capacity > 0 THEN (l.occupied * 100.0 / l.capacity) ELSE 0 END) as utilization_rate
+            FROM locations l
+        ),
+        transaction_stats AS (
+            SELECT
+                COUNT(*) as pick_count,
+                SUM(t.quantity) as units_picked_30d,
+                DATEDIFF(second, MIN(t.timestamp), MAX(t.timestamp)) / 60.0 as pick_span_minutes
+            FROM transactions t
+            WHERE t.type = 'pick'
+              AND t.timestamp >= DATEADD(day, -30, GETDATE())
+        )
+        SELECT
+            os.total_orders,
+            os.orders_processed,
+            os.orders_shipped,
+            os.orders_shipped_on_time,
+            ps.units_picked,
+            ps.units_to_pick,
+            ist.inventory_value,
+            ist.inventory_units,
+            ist.low_stock_items,
+            ls.utilization_rate,
+            ts.pick_count,
+            ts.units_picked_30d,
+            ts.pick_span_minutes
+        FROM order_stats os
+        CROSS JOIN pick_stats ps
+        CROSS JOIN inventory_stats ist
+        CROSS JOIN location_stats ls
+        CROSS JOIN transaction_stats ts
+        """
+        
+        with self.get_connection() as conn:
+            df = pd.read_sql(query, conn, params=[self.config.DELIVERY_SLA_HOURS])
+            return df.iloc[0].to_dict()
+    
+    def get_inventory_data(self, search='', category='', limit=None, after=None):
+        """Get inventory data with optional filtering, starting after an optional (name, id) key"""
+        if search and after is None:
+            index = self.get_search_index()
+            if index is not None:
+                ids = index.search(search, category, limit=limit or self.config.SEARCH_RESULT_LIMIT)
+                return self.get_inventory_by_ids(ids)
+        
+        query = """
+        SELECT {top}
             i.id,
             i.sku,
             i.name,
@@ -98,7 +329,21 @@ class DatabaseService:
             query += " AND i.category = ?"
             params.append(category)
         
-        query += " ORDER BY i.name"
+        # NULL names sort first under ascending ordering
+        if after and after[0] is None:
+            query += " AND ((i.name IS NULL AND i.id > ?) OR i.name IS NOT NULL)"
+            params.append(after[1])
+        elif after:
+            query += " AND (i.name > ? OR (i.name = ? AND i.id > ?))"
+            params.extend([after[0], after[0], after[1]])
+        
+        query += " ORDER BY i.name, i.id"
+        
+        if limit:
+            query = query.format(top="TOP (?)")
+            params.insert(0, limit)
+        else:
+            query = query.format(top="")
         
         try:
             with self.get_connection() as conn:
@@ -106,11 +351,131 @@ class DatabaseService:
                 return df.to_dict('records')
         except Exception as e:
             self.logger.error(f"Error fetching inventory: {e}")
-            return self._get_mock_inventory()
+            return self._serve_mock(self._get_mock_inventory())
     
-    def get_orders_data(self, status='', priority=''):
-        """Get orders data with optional filtering"""
-        query = """
+    def get_inventory_page(self, search='', category='', limit=100, cursor=None):
+        """Get one keyset page of inventory data and the cursor for the next page"""
+        if search and self.get_search_index() is not None:
+            return self._get_inventory_search_page(search, category, limit, cursor)
+        
+        after = _decode_cursor(cursor) if cursor else None
+        records = self.get_inventory_data(search, category, limit=limit + 1, after=after)
+        
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            next_cursor = _encode_cursor([last['name'], last['id']])
+        
+        return records, next_cursor
+    
+    def _get_inventory_search_page(self, search, category, limit, cursor):
+        """Get one page of ranked search results; the cursor holds the rank offset"""
+        offset = 0
+        if cursor:
+            kind, offset = _decode_cursor(cursor)
+            if kind != 'rank' or not isinstance(offset, int) or offset < 0:
+                raise ValueError("Invalid pagination cursor")
+        
+        ids = self.search_index.search(search, category, limit=limit + 1, offset=offset)
+        next_cursor = _encode_cursor(['rank', offset + limit]) if len(ids) > limit else None
+        return self.get_inventory_by_ids(ids[:limit]), next_cursor
+    
+    def get_inventory_by_ids(self, ids):
+        """Get inventory rows by id, in the order of ids"""
+        if not ids:
+            return []
+        
+        records = {}
+        try:
+            with self.get_connection() as conn:
+                # SQL Server accepts at most 2100 parameters per statement
+                for start in range(0, len(ids), 1000):
+                    chunk = list(ids[start:start + 1000])
+                    placeholders = ', '.join('?' for _ in chunk)
+                    df = pd.read_sql(f"""
+                        SELECT id, sku, name, category, current_stock, min_stock, max_stock,
+                               location, last_updated, unit_cost, supplier
+                        FROM inventory
+                        WHERE id IN ({placeholders})
+                    """, conn, params=chunk)
+                    for record in df.to_dict('records'):
+                        records[str(record['id'])] = record
+        except Exception as e:
+            self.logger.error(f"Error fetching inventory: {e}")
+            records = {str(record['id']): record for record in self._serve_mock(self._get_mock_inventory())}
+        
+        # Rows deleted since the index was built are skipped
+        return [records[str(i)] for i in ids if str(i) in records]
+    
+    def get_search_index(self):
+        """Get the inventory search index, or None while it has not been built"""
+        return self.search_index
+    
+    def start_search_index_build(self):
+        """Build the search index in a background thread so no request waits for it"""
+        threading.Thread(target=self.refresh_search_index, name='search-index', daemon=True).start()
+    
+    def refresh_search_index(self):
+        """Rebuild the inventory search index from the inventory table and swap it in.
+
+        Returns None and keeps the current index if the table cannot be read.
+        """
+        with self._search_lock:
+            try:
+                with self.get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT id, sku, name, category FROM inventory")
+                    rows = list(self._iter_rows(cursor))
+            except Exception as e:
+                self.logger.error(f"Error reading inventory for the search index: {e}")
+                return None
+            
+            self.search_index = InventorySearchIndex(rows)
+            self.logger.info(f"Inventory search index rebuilt with {len(self.search_index)} items")
+            return self.search_index
+    
+    def get_orders_data(self, status='', priority='', limit=None, after=None):
+        """Get orders data with optional filtering, starting after an optional (order_date, id) key"""
+        orders_query = """
+            SELECT {top}
+                o.id,
+                o.order_number,
+                o.customer,
+                o.status,
+                o.priority,
+                o.order_date,
+                o.total_value
+            FROM orders o
+            WHERE 1=1
+        """
+        
+        params = []
+        if status:
+            orders_query += " AND o.status = ?"
+            params.append(status)
+        
+        if priority:
+            orders_query += " AND o.priority = ?"
+            params.append(priority)
+        
+        # NULL order dates sort last under DESC ordering
+        if after and after[0] is None:
+            orders_query += " AND o.order_date IS NULL AND o.id < ?"
+            params.append(after[1])
+        elif after:
+            after_date = datetime.fromisoformat(after[0])
+            orders_query += " AND (o.order_date < ? OR (o.order_date = ? AND o.id < ?) OR o.order_date IS NULL)"
+            params.extend([after_date, after_date, after[1]])
+        
+        # Limit orders rather than joined item lines so a page never splits an order
+        if limit:
+            orders_query = orders_query.format(top="TOP (?)") + " ORDER BY o.order_date DESC, o.id DESC"
+            params.insert(0, limit)
+        else:
+            orders_query = orders_query.format(top="")
+        
+        query = f"""
         SELECT 
             o.id,
             o.order_number,
@@ -124,80 +489,121 @@ class DatabaseService:
             oi.quantity,
             oi.picked_quantity,
             oi.unit_price
-        FROM orders o
+        FROM ({orders_query}) o
         LEFT JOIN order_items oi ON o.id = oi.order_id
-        WHERE 1=1
+        ORDER BY o.order_date DESC, o.id DESC
         """
         
-        params = []
-        if status:
-            query += " AND o.status = ?"
-            params.append(status)
-        
-        if priority:
-            query += " AND o.priority = ?"
-            params.append(priority)
-        
-        query += " ORDER BY o.order_date DESC"
-        
         try:
             with self.get_connection() as conn:
-                df = pd.read_sql(query, conn, params=params)
-                
-                # Group by order and aggregate items
-                orders = []
-                for order_id, group in df.groupby('id'):
-                    order_data = group.iloc[0]
-                    items = []
-                    
-                    for _, item in group.iterrows():
-                        if pd.notna(item['sku']):
-                            items.append({
-                                'sku': item['sku'],
-                                'name': item['item_name'],
-                                'quantity': item['quantity'],
-                                'picked_quantity': item['picked_quantity'],
-                                'unit_price': item['unit_price']
-                            })
-                    
-                    orders.append({
-                        'id': order_data['id'],
-                        'order_number': order_data['order_number'],
-                        'customer': order_data['customer'],
-                        'status': order_data['status'],
-                        'priority': order_data['priority'],
-                        'order_date': order_data['order_date'].isoformat() if pd.notna(order_data['order_date']) else None,
-                        'total_value': order_data['total_value'],
-                        'items': items
-                    })
-                
-                return orders
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                return _nest_order_lines(self._iter_rows(cursor))
         except Exception as e:
             self.logger.error(f"Error fetching orders: {e}")
-            return self._get_mock_orders()
+            return self._serve_mock(self._get_mock_orders())
+    
+    def get_orders_page(self, status='', priority='', limit=100, cursor=None):
+        """Get one keyset page of orders and the cursor for the next page"""
+        after = _decode_cursor(cursor) if cursor else None
+        orders = self.get_orders_data(status, priority, limit=limit + 1, after=after)
+        
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            last = orders[-1]
+            next_cursor = _encode_cursor([last['order_date'], last['id']])
+        
+        return orders, next_cursor
     
-    def get_location_data(self):
-        """Get warehouse location utilization data"""
+    def iter_transactions(self, days):
+        """Stream warehouse transactions from the last days as dicts, DB_FETCH_SIZE rows at a time"""
         query = """
-        SELECT 
-            zone,
-            aisle,
-            rack,
-            shelf,
-            capacity,
-            occupied,
-            CASE WHEN capacity > 0 THEN (occupied * 100.0 / capacity) ELSE 0 END as utilization_rate
-        FROM locations
-        ORDER BY zone, aisle, rack, shelf
+        SELECT t.transaction_id, t.type, t.sku, t.quantity, t.timestamp
+        FROM transactions t
+        WHERE t.timestamp >= DATEADD(day, ?, GETDATE())
+        ORDER BY t.timestamp
         """
         
-        try:
-            with self.get_connection() as conn:
-                df = pd.read_sql(query, conn)
-                return df.to_dict('records')
-        except Exception as e:
-            self.logger.error(f"Error fetching locations: {e}")
-            return self._get_mock_locations()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, -days)
+            for transaction_id, tx_type, sku, quantity, timestamp in self._iter_rows(cursor):
+                yield {
+                    'transaction_id': transaction_id,
+                    'type': tx_type,
+                    'sku': sku,
+                    'quantity': _number(quantity),
+                    'timestamp': timestamp
+                }
+    
+    def iter_export(self, table, filters=None):
+        """Stream a table for export: yields (column, python type) pairs, then lists of up to DB_FETCH_SIZE row tuples.
+
+        Raises ValueError for an unknown table or a malformed filter value.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown export table: {table}; choose from {', '.join(EXPORT_TABLES)}")
+        columns, order_by, conditions = EXPORT_TABLES[table]
+        filters = filters or {}
+        
+        query = f"SELECT {', '.join(columns)} FROM {table} WHERE 1=1"
+        params = []
+        for name, (condition, convert) in conditions.items():
+            value = filters.get(name)
+            if value in (None, ''):
+                continue
+            try:
+                params.append(convert(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {name} filter: {value}")
+            query += f" AND {condition}"
+        query += f" ORDER BY {order_by}"
+        
+        return self._export_rows(table, query, params)
+    
+    def _export_rows(self, table, query, params):
+        """Run an export query on one pooled connection and yield its rows batch by batch"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, *params)
+                yield [(column[0], column[1]) for column in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(self.config.DB_FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield rows
+            except GeneratorExit:
+                self.logger.info(f"Export of {table} cancelled by the client")
+                raise
+            except Exception as e:
+                self.logger.error(f"Error exporting {table}: {e}")
+                raise
+            finally:
+                # Discard unread results so the pooled connection can be reused
+                cursor.close()
+    
+    def get_stock_levels(self):
+        """Get (sku, current_stock, category) for every inventory item"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT i.sku, i.current_stock, i.category FROM inventory i")
+            return [tuple(row) for row in self._iter_rows(cursor)]
+    
+    def get_location_rows(self):
+        """Get (zone, aisle, rack, shelf, capacity, occupied) for every location; raises on failure"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT zone, aisle, rack, shelf, capacity, occupied FROM locations")
+            return [tuple(row) for row in self._iter_rows(cursor)]
+    
+    def get_mock_location_rows(self):
+        """Mock location rows in the shape of get_location_rows"""
+        return [
+            (l['zone'], l['aisle'], l['rack'], l['shelf'], l['capacity'], l['occupied'])
+            for l in self._get_mock_locations()
+        ]
     
     def get_total_records(self):
         """Get total number of records across all tables"""
@@ -222,33 +628,64 @@ class DatabaseService:
             return 27151  # Mock data
     
     def update_data(self, processed_data):
-        """Update database with processed data from WMS"""
+        """Update database with processed data from WMS.
+
+        Returns the number of rows updated per table. Only stock and status
+        columns are written, so the search index, which holds sku, name and
+        category and reads result rows back by id, stays consistent.
+        """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
+                writer = BulkWriter(conn, batch_size=self.config.DB_WRITE_BATCH_SIZE)
                 
                 # Update inventory
-                for item in processed_data.get('inventory', []):
-                    cursor.execute("""
-                        UPDATE inventory 
-                        SET current_stock = ?, last_updated = GETDATE()
-                        WHERE sku = ?
-                    """, (item['current_stock'], item['sku']))
+                inventory_rows = _column_rows(processed_data.get('inventory', []), ['sku', 'current_stock'])
+                inventory_updated = writer.update(
+                    'inventory',
+                    ('sku', 'NVARCHAR(100)'),
+                    [('current_stock', 'INT')],
+                    inventory_rows,
+                    touch_column='last_updated'
+                )
                 
-                # Update order status
-                for order in processed_data.get('orders', []):
-                    cursor.execute("""
-                        UPDATE orders 
-                        SET status = ?, last_updated = GETDATE()
-                        WHERE order_number = ?
-                    """, (order['status'], order['order_number']))
+                # Update order status, stamping changes with the WMS update time so
+                # on-time delivery measures when an order actually shipped
+                order_rows = (
+                    (order_number, status, _wms_time(changed_at))
+                    for order_number, status, changed_at in _column_rows(
+                        processed_data.get('orders', []), ['order_number', 'status', 'last_updated']
+                    )
+                )
+                orders_updated = writer.update(
+                    'orders',
+                    ('order_number', 'NVARCHAR(100)'),
+                    [('status', 'NVARCHAR(50)')],
+                    order_rows,
+                    touch_column='last_updated',
+                    touch_source=('wms_updated_at', 'DATETIME2')
+                )
                 
-                conn.commit()
-                self.logger.info("Database updated successfully")
+            rows_affected = {
+                'inventory': inventory_updated,
+                'orders': orders_updated
+            }
+            self.logger.info(f"Database updated successfully: {rows_affected}")
+            return rows_affected
         except Exception as e:
             self.logger.error(f"Error updating database: {e}")
             raise
     
+    def _serve_mock(self, data):
+        """Return mock data in place of a failed read, flagging it for take_mock_fallback"""
+        self._fallback.used = True
+        return data
+    
+    def take_mock_fallback(self):
+        """Whether a read on this thread fell back to mock data since the last call; clears the flag"""
+        used = getattr(self._fallback, 'used', False)
+        self._fallback.used = False
+        return used
+    
     def _get_mock_metrics(self):
         """Return mock metrics data"""
         return {
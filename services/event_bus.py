@@ -0,0 +1,106 @@
+import json
+import queue
+import threading
+import logging
+from collections import deque
+
+
+class SubscriberLimitError(Exception):
+    """Raised when the event bus already has its maximum number of subscribers"""
+    pass
+
+
+class _Subscription:
+    """Per-client queue of pending events"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class EventBus:
+    """In-process publish/subscribe channel for dashboard Server-Sent Events.
+
+    Published events get increasing ids and are kept in a short history so a
+    reconnecting client can replay what it missed via Last-Event-ID. A client
+    that falls more than queue_size events behind is disconnected and catches
+    up from the history when it reconnects.
+    """
+
+    def __init__(self, max_subscribers=100, queue_size=100, history_size=200):
+        self.logger = logging.getLogger(__name__)
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._next_id = 1
+        self._published = 0
+        self._dropped = 0
+
+    def publish(self, event_type, data):
+        """Send an event to every subscriber"""
+        with self._lock:
+            event = (self._next_id, event_type, json.dumps(data, default=str))
+            self._next_id += 1
+            self._published += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+
+    def stream(self, last_event_id=None, keepalive=15, retry=3000):
+        """Yield SSE-formatted events for one client until it disconnects.
+
+        Raises SubscriberLimitError if max_subscribers clients are connected.
+        """
+        subscription = _Subscription(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SubscriberLimitError(f"Event stream limit of {self.max_subscribers} clients reached")
+            self._subscribers.add(subscription)
+            backlog = [e for e in self._history if last_event_id is not None and e[0] > last_event_id]
+
+        def generate():
+            try:
+                yield f"retry: {retry}\n\n"
+                for event in backlog:
+                    yield self._format(event)
+                while True:
+                    try:
+                        event = subscription.queue.get(timeout=keepalive)
+                    except queue.Empty:
+                        # Comment lines keep proxies from closing an idle stream
+                        yield ": keepalive\n\n"
+                        continue
+                    yield self._format(event)
+                    if subscription.overflowed:
+                        with self._lock:
+                            self._dropped += 1
+                        self.logger.info("Dropping slow event stream client")
+                        return
+            finally:
+                with self._lock:
+                    self._subscribers.discard(subscription)
+
+        return generate()
+
+    def stats(self):
+        """Get subscriber and event counters"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'events_published': self._published,
+                'slow_clients_dropped': self._dropped,
+                'last_event_id': self._next_id - 1
+            }
+
+    def _format(self, event):
+        """Encode one event in the text/event-stream format"""
+        event_id, event_type, data = event
+        return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+
+
+def file_signature(path):
+    """Cheap change signature (inode, mtime, size), or None if the file is missing.
+
+    The inode changes when the WMS replaces a file by atomic rename.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """BLAKE2 digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileWatcher:
+    """Stat-based watcher for the files the WMS writes.
+
+    Each file is polled every interval seconds. A change is reported only after
+    its signature has stayed the same for settle_time seconds, so files still
+    being written are not ingested, and only if its checksum differs from the
+    last reported version. ``on_change(paths)`` receives the changed paths.
+    """
+
+    def __init__(self, paths, on_change, interval=1.0, settle_time=2.0):
+        self.logger = logging.getLogger(__name__)
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self.settle_time = settle_time
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observed = {}   # path -> (signature, first seen at)
+        self._reported = {}   # path -> (signature, checksum)
+        self._events = 0
+        self._last_event = None
+
+    def start(self):
+        """Start polling in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        # Files already present are the baseline; the next scheduled sync reads them
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature is not None:
+                self._reported[path] = (signature, None)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='wms-file-watcher', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Watching {len(self.paths)} WMS files every {self.interval}s")
+
+    def stop(self):
+        """Stop polling after the current pass"""
+        self._stop.set()
+
+    def poll(self):
+        """Check every file once and return the paths that changed and settled"""
+        now = time.monotonic()
+        changed = []
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature is None:
+                self._observed.pop(path, None)
+                continue
+
+            reported = self._reported.get(path)
+            if reported and reported[0] == signature:
+                continue
+
+            observed = self._observed.get(path)
+            if observed is None or observed[0] != signature:
+                self._observed[path] = (signature, now)
+                continue
+            if now - observed[1] < self.settle_time:
+                continue
+
+            try:
+                checksum = file_checksum(path)
+            except OSError as e:
+                self.logger.warning(f"Failed to checksum {path}: {e}")
+                continue
+            # A rewrite with identical contents (e.g. a touch) is not a change
+            if reported is None or reported[1] != checksum:
+                changed.append(path)
+            self._reported[path] = (signature, checksum)
+            self._observed.pop(path, None)
+
+        if changed:
+            with self._lock:
+                self._events += 1
+                self._last_event = datetime.now().isoformat()
+        return changed
+
+    def status(self):
+        """Get watcher state for the integration status endpoint"""
+        with self._lock:
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'files': len(self.paths),
+                'change_events': self._events,
+                'last_change_at': self._last_event
+            }
+
+    def _loop(self):
+        """Poll until stopped, handing settled changes to on_change"""
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.poll()
+                if changed:
+                    self.logger.info(f"WMS files changed: {', '.join(changed)}")
+                    self.on_change(changed)
+            except Exception as e:
+                self.logger.error(f"File watch pass failed: {e}")
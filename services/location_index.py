@@ -0,0 +1,119 @@
+import numpy as np
+from datetime import datetime
+
+LEVELS = ('zone', 'aisle', 'rack', 'shelf')
+
+
+class LocationIndex:
+    """Immutable zone -> aisle -> rack -> shelf tree over compact arrays.
+
+    Shelves are sorted by their path so every node's descendants are one
+    contiguous slice. Capacity and occupancy are summed once per level at build
+    time, so any roll-up or drill-down is a dict lookup plus an array slice.
+    Rebuild it after a sync and swap the reference; it is never mutated.
+    """
+
+    def __init__(self, rows=()):
+        """Build from (zone, aisle, rack, shelf, capacity, occupied) rows"""
+        rows = sorted(
+            (tuple(str(part) for part in row[:4]), int(row[4] or 0), int(row[5] or 0))
+            for row in rows
+        )
+        paths = [row[0] for row in rows]
+        capacity = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        occupied = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+
+        self.built_at = datetime.now().isoformat()
+        self.keys = []        # per level: node path prefixes in sorted order
+        self.lookup = []      # per level: prefix -> node position
+        self.capacity = []    # per level: summed capacity per node
+        self.occupied = []    # per level: summed occupancy per node
+        self.counts = []      # per level: shelves under each node
+        self.children = []    # per level: (first child, end child) positions on the next level
+
+        for depth in range(1, len(LEVELS) + 1):
+            starts = [i for i, path in enumerate(paths) if i == 0 or path[:depth] != paths[i - 1][:depth]]
+            keys = [paths[i][:depth] for i in starts]
+            starts = np.asarray(starts, dtype=np.int64)
+            self.keys.append(keys)
+            self.lookup.append({key: position for position, key in enumerate(keys)})
+            if len(starts):
+                self.capacity.append(np.add.reduceat(capacity, starts))
+                self.occupied.append(np.add.reduceat(occupied, starts))
+                self.counts.append(np.diff(np.append(starts, len(paths))))
+            else:
+                empty = np.zeros(0, dtype=np.int64)
+                self.capacity.append(empty)
+                self.occupied.append(empty)
+                self.counts.append(empty)
+
+        for depth in range(len(LEVELS) - 1):
+            parents = self.lookup[depth]
+            first = np.zeros(len(self.keys[depth]), dtype=np.int64)
+            end = np.zeros(len(self.keys[depth]), dtype=np.int64)
+            for position, key in enumerate(self.keys[depth + 1]):
+                parent = parents[key[:-1]]
+                if end[parent] == 0:
+                    first[parent] = position
+                end[parent] = position + 1
+            self.children.append((first, end))
+
+    def __len__(self):
+        return len(self.keys[-1])
+
+    def nodes(self, level='zone', zone=None, aisle=None, rack=None):
+        """Roll-up rows for every node at level, optionally under one zone/aisle/rack.
+
+        Raises ValueError for an unknown level or a filter that skips a level.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level: {level}; choose from {', '.join(LEVELS)}")
+        depth = LEVELS.index(level)
+
+        prefix = []
+        for value in (zone, aisle, rack):
+            if value is None:
+                break
+            prefix.append(str(value))
+        if len(prefix) < sum(v is not None for v in (zone, aisle, rack)):
+            raise ValueError("Location filters must be given from zone down without gaps")
+        if len(prefix) > depth:
+            raise ValueError(f"Cannot filter by {LEVELS[len(prefix) - 1]} when listing {level}s")
+
+        if prefix:
+            parent_depth = len(prefix) - 1
+            position = self.lookup[parent_depth].get(tuple(prefix))
+            if position is None:
+                return []
+            lo, hi = position, position + 1
+            for current in range(parent_depth, depth):
+                first, end = self.children[current]
+                lo, hi = int(first[lo]), int(end[hi - 1])
+        else:
+            lo, hi = 0, len(self.keys[depth])
+
+        return [self._node(depth, position) for position in range(lo, hi)]
+
+    def totals(self):
+        """Capacity and occupancy of the whole warehouse"""
+        capacity = int(self.capacity[0].sum())
+        occupied = int(self.occupied[0].sum())
+        return {
+            'capacity': capacity,
+            'occupied': occupied,
+            'locations': len(self),
+            'utilization_rate': round(occupied * 100.0 / capacity, 1) if capacity else 0
+        }
+
+    def _node(self, depth, position):
+        """One node as an API row"""
+        capacity = int(self.capacity[depth][position])
+        occupied = int(self.occupied[depth][position])
+        node = dict(zip(LEVELS, self.keys[depth][position]))
+        node.update({
+            'capacity': capacity,
+            'occupied': occupied,
+            'locations': int(self.counts[depth][position]),
+            'utilization_rate': round(occupied * 100.0 / capacity, 1) if capacity else 0
+        })
+        return node
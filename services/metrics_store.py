@@ -0,0 +1,103 @@
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+
+# Metrics kept in each snapshot, one REAL column apiece
+SNAPSHOT_FIELDS = [
+    'total_orders',
+    'orders_processed',
+    'orders_shipped',
+    'inventory_value',
+    'low_stock_items',
+    'utilization_rate',
+    'picking_efficiency',
+    'on_time_delivery',
+    'inventory_turnover',
+    'order_fulfillment_rate',
+    'average_pick_time',
+    'space_utilization'
+]
+
+
+class MetricsStore:
+    """Time series of warehouse metric snapshots in a local SQLite file.
+
+    The sync pipeline records a snapshot after each sync; the newest one is
+    also held in memory so reading current metrics costs no query.
+    """
+
+    def __init__(self, path, retention_days=90):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        columns = ', '.join(f'{field} REAL' for field in SNAPSHOT_FIELDS)
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS metric_snapshots (taken_at REAL PRIMARY KEY, {columns})')
+        self._conn.commit()
+        self._latest = self._load_latest()
+
+    def record(self, metrics):
+        """Store a snapshot of metrics and return it as served by latest()"""
+        taken_at = time.time()
+        values = [self._number(metrics.get(field)) for field in SNAPSHOT_FIELDS]
+        placeholders = ', '.join('?' for _ in range(len(SNAPSHOT_FIELDS) + 1))
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO metric_snapshots (taken_at, {', '.join(SNAPSHOT_FIELDS)}) VALUES ({placeholders})",
+                [taken_at] + values
+            )
+            if self.retention_days:
+                self._conn.execute(
+                    'DELETE FROM metric_snapshots WHERE taken_at < ?',
+                    (taken_at - self.retention_days * 86400,)
+                )
+            self._conn.commit()
+            self._latest = self._to_snapshot(taken_at, values)
+            return dict(self._latest)
+
+    def latest(self):
+        """Get the newest snapshot, or None if none has been recorded"""
+        with self._lock:
+            return dict(self._latest) if self._latest else None
+
+    def history(self, fields=None, since=None, limit=1000):
+        """Get snapshots oldest first, optionally only some fields and only after since (epoch seconds)"""
+        fields = [f for f in (fields or SNAPSHOT_FIELDS) if f in SNAPSHOT_FIELDS]
+        if not fields:
+            raise ValueError(f"Unknown metrics; choose from {', '.join(SNAPSHOT_FIELDS)}")
+
+        # Newest `limit` rows, returned in time order
+        query = f"SELECT taken_at, {', '.join(fields)} FROM metric_snapshots WHERE taken_at >= ? ORDER BY taken_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (since or 0, limit)).fetchall()
+        return [self._to_snapshot(row[0], row[1:], fields) for row in reversed(rows)]
+
+    def _load_latest(self):
+        """Read the newest stored snapshot at startup"""
+        try:
+            row = self._conn.execute(
+                f"SELECT taken_at, {', '.join(SNAPSHOT_FIELDS)} FROM metric_snapshots ORDER BY taken_at DESC LIMIT 1"
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to load latest metric snapshot from {self.path}: {e}")
+            return None
+        return self._to_snapshot(row[0], row[1:]) if row else None
+
+    def _to_snapshot(self, taken_at, values, fields=SNAPSHOT_FIELDS):
+        """Build a snapshot dict from a stored row"""
+        snapshot = dict(zip(fields, values))
+        snapshot['taken_at'] = datetime.fromtimestamp(taken_at).isoformat()
+        return snapshot
+
+    def _number(self, value):
+        """Coerce a metric to float, keeping missing values as NULL"""
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if number != number else number  # NaN from empty aggregates
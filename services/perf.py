@@ -0,0 +1,333 @@
+import re
+import threading
+import time
+import logging
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+from config import Config
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# First table a statement reads or writes, for a low-cardinality query label
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+([#\w.\[\]]+)', re.IGNORECASE)
+
+
+def statement_name(sql):
+    """Label a SQL statement by its verb and first table, e.g. 'SELECT inventory'"""
+    words = sql.split(None, 1)
+    verb = words[0].upper() if words else ''
+    match = _TABLE.search(sql)
+    return f"{verb} {match.group(1).strip('[]')}" if match else verb
+
+
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Series:
+    """Counters and latency distribution of one timed operation"""
+
+    def __init__(self, sample_size):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.samples = deque(maxlen=sample_size)
+
+
+class _Timing:
+    """Row and byte counts a timed block can fill in before it ends"""
+
+    def __init__(self):
+        self.rows = None
+        self.bytes = None
+
+
+class PerfRecorder:
+    """In-process latency histograms per operation, grouped by kind.
+
+    Kinds are 'http' (routes), 'db' (statements), 'wms' (transport attempts)
+    and 'processor' (DataProcessor stages). Each operation keeps cumulative
+    histogram buckets for Prometheus plus its most recent samples, from which
+    p50/p95/p99 are reported. Database statements slower than the slow query
+    threshold are logged with their SQL text and kept in a short slow log.
+    """
+
+    def __init__(self, enabled=True, sample_size=1024, slow_query_seconds=0.5, slow_log_size=100):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.sample_size = sample_size
+        self.slow_query_seconds = slow_query_seconds
+        self.started_at = time.time()
+
+        self._lock = threading.Lock()
+        self._series = {}  # (kind, name) -> _Series
+        self._slow_queries = deque(maxlen=slow_log_size)
+
+    def observe(self, kind, name, seconds, rows=None, nbytes=None, error=False):
+        """Record one timed operation"""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                series = self._series[(kind, name)] = _Series(self.sample_size)
+            series.buckets[bisect_left(BUCKETS, seconds)] += 1
+            series.count += 1
+            series.total += seconds
+            series.max = max(series.max, seconds)
+            series.samples.append(seconds)
+            if error:
+                series.errors += 1
+            if rows:
+                series.rows += rows
+            if nbytes:
+                series.bytes += nbytes
+
+    @contextmanager
+    def timer(self, kind, name):
+        """Time a with block; the yielded object takes rows and bytes counts"""
+        timing = _Timing()
+        started = time.perf_counter()
+        try:
+            yield timing
+        except BaseException:
+            self.observe(kind, name, time.perf_counter() - started, timing.rows, timing.bytes, error=True)
+            raise
+        self.observe(kind, name, time.perf_counter() - started, timing.rows, timing.bytes)
+
+    def record_query(self, sql, seconds, rows=None, error=False):
+        """Record one database statement, logging it if slow"""
+        if not self.enabled:
+            return
+        self.observe('db', statement_name(sql), seconds, rows, error=error)
+        if seconds >= self.slow_query_seconds:
+            text = ' '.join(sql.split())
+            self.logger.warning(f"Slow query ({seconds * 1000:.0f} ms, {rows or 0} rows): {text[:2000]}")
+            with self._lock:
+                self._slow_queries.append({
+                    'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'seconds': round(seconds, 4),
+                    'rows': rows,
+                    'error': error,
+                    'sql': text[:2000]
+                })
+
+    def snapshot(self, kind=None):
+        """Per-operation counts and percentiles, plus the slow query log"""
+        with self._lock:
+            items = [(key, series, sorted(series.samples)) for key, series in self._series.items()
+                     if kind is None or key[0] == kind]
+            slow_queries = list(self._slow_queries)
+
+        operations = {}
+        for (series_kind, name), series, ordered in sorted(items, key=lambda item: item[0]):
+            operations.setdefault(series_kind, {})[name] = {
+                'count': series.count,
+                'errors': series.errors,
+                'rows': series.rows,
+                'bytes': series.bytes,
+                'mean_ms': round(series.total / series.count * 1000, 3) if series.count else None,
+                'max_ms': round(series.max * 1000, 3),
+                'p50_ms': round(_percentile(ordered, 0.50) * 1000, 3) if ordered else None,
+                'p95_ms': round(_percentile(ordered, 0.95) * 1000, 3) if ordered else None,
+                'p99_ms': round(_percentile(ordered, 0.99) * 1000, 3) if ordered else None
+            }
+        return {
+            'enabled': self.enabled,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'percentile_window': self.sample_size,
+            'operations': operations,
+            'slow_queries': slow_queries
+        }
+
+    def prometheus(self):
+        """Render every series in the Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(
+                ((key, list(series.buckets), series.count, series.total, series.errors, series.rows, series.bytes)
+                 for key, series in self._series.items()),
+                key=lambda item: item[0]
+            )
+
+        lines = []
+        for kind in sorted({key[0] for key, *_ in items}):
+            family = f"wms_app_{kind}"
+            kind_items = [item for item in items if item[0][0] == kind]
+            lines.append(f"# HELP {family}_duration_seconds Latency of {kind} operations")
+            lines.append(f"# TYPE {family}_duration_seconds histogram")
+            for (_, name), buckets, count, total, *_ in kind_items:
+                label = f'name="{_label(name)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, buckets):
+                    cumulative += bucket_count
+                    lines.append(f'{family}_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{family}_duration_seconds_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{family}_duration_seconds_sum{{{label}}} {total}')
+                lines.append(f'{family}_duration_seconds_count{{{label}}} {count}')
+            for metric, position, description in (('errors', 4, 'Failed'), ('rows', 5, 'Rows handled by'),
+                                                  ('bytes', 6, 'Bytes handled by')):
+                lines.append(f"# HELP {family}_{metric}_total {description} {kind} operations")
+                lines.append(f"# TYPE {family}_{metric}_total counter")
+                for item in kind_items:
+                    lines.append(f'{family}_{metric}_total{{name="{_label(item[0][1])}"}} {item[position]}')
+        return '\n'.join(lines) + '\n'
+
+
+class _ProfiledCursor:
+    """DB-API cursor wrapper that times each statement from execute until its rows are read.
+
+    Time spent by the caller between fetches is not counted.
+    """
+
+    def __init__(self, cursor, recorder):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_recorder', recorder)
+        object.__setattr__(self, '_sql', None)
+        object.__setattr__(self, '_elapsed', 0.0)
+        object.__setattr__(self, '_rows', 0)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # e.g. fast_executemany belongs on the real cursor
+        setattr(self._cursor, name, value)
+
+    def execute(self, sql, *params):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        except Exception:
+            self._recorder.record_query(sql, time.perf_counter() - started, error=True)
+            raise
+        object.__setattr__(self, '_sql', sql)
+        object.__setattr__(self, '_elapsed', time.perf_counter() - started)
+        object.__setattr__(self, '_rows', 0)
+        return self
+
+    def executemany(self, sql, params):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, params)
+        except Exception:
+            self._recorder.record_query(sql, time.perf_counter() - started, error=True)
+            raise
+        rows = len(params) if hasattr(params, '__len__') else None
+        self._recorder.record_query(sql, time.perf_counter() - started, rows)
+        return self
+
+    def fetchone(self):
+        row = self._timed_fetch(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._add_rows(1)
+        return row
+
+    def fetchmany(self, *size):
+        rows = self._timed_fetch(self._cursor.fetchmany, *size)
+        self._add_rows(len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(self._cursor.fetchall)
+        self._add_rows(len(rows))
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            object.__setattr__(self, '_elapsed', self._elapsed + time.perf_counter() - started)
+
+    def _add_rows(self, count):
+        object.__setattr__(self, '_rows', self._rows + count)
+
+    def _finish(self):
+        """Record the current statement once its results are read or abandoned"""
+        sql = self._sql
+        if sql is None:
+            return
+        object.__setattr__(self, '_sql', None)
+        rows = self._rows
+        if not rows:
+            # Statements without a result set report the rows they changed
+            try:
+                if self._cursor.description is None and self._cursor.rowcount > 0:
+                    rows = self._cursor.rowcount
+            except Exception:
+                pass
+        self._recorder.record_query(sql, self._elapsed, rows)
+
+
+class ProfiledConnection:
+    """DB-API connection wrapper whose cursors record every statement"""
+
+    def __init__(self, conn, recorder):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_recorder', recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def cursor(self):
+        return _ProfiledCursor(self._conn.cursor(), self._recorder)
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+
+# Shared by every service so one endpoint can report them all
+recorder = PerfRecorder(
+    enabled=Config.PERF_ENABLED,
+    sample_size=Config.PERF_SAMPLE_SIZE,
+    slow_query_seconds=Config.PERF_SLOW_QUERY_MS / 1000.0,
+    slow_log_size=Config.PERF_SLOW_LOG_SIZE
+)
@@ -0,0 +1,183 @@
+import bisect
+import numpy as np
+from datetime import datetime
+
+# Bits per code point in a packed trigram; every Unicode code point fits
+_SHIFT = 21
+
+# Separates the searchable fields of a document so no match spans two of them
+_SEP = '\x00'
+
+# Scan documents in chunks so a query stops early once it has enough results
+_CHUNK = 4096
+
+# Short queries gather postings exactly up to this many, else scan in name order
+_SHORT_UNION_LIMIT = 200000
+
+
+def _code_points(text):
+    """Code points of text as an int64 array"""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def _trigrams(points):
+    """Packed trigram codes at every position of a code point array"""
+    return (points[:-2] << (2 * _SHIFT)) | (points[1:-1] << _SHIFT) | points[2:]
+
+
+class InventorySearchIndex:
+    """Case-insensitive substring index over inventory sku, name and category.
+
+    Matches what `LIKE '%term%'` on the three columns would return, ranked as
+    exact SKU, then SKU prefix, then any other match in name order. Posting
+    lists of trigrams are sorted by name order, so a query walks them until it
+    has a page of results instead of ranking every match. Rebuild it from the
+    table and swap the reference; it is never mutated.
+    """
+
+    def __init__(self, rows=()):
+        """Build from (id, sku, name, category) rows"""
+        docs = sorted(
+            (row for row in rows if row[1] is not None),
+            key=lambda row: (row[2] is not None, str(row[2] or '').lower(), str(row[0]))
+        )
+        self.built_at = datetime.now()
+        self.ids = [row[0] for row in docs]
+        self.texts = [
+            _SEP.join(str(field or '').replace(_SEP, ' ') for field in row[1:4]).lower() + _SEP * 2
+            for row in docs
+        ]
+
+        categories = {}
+        self._categories = categories
+        self._category_of = np.fromiter(
+            (categories.setdefault(row[3], len(categories)) for row in docs),
+            dtype=np.int32, count=len(docs)
+        )
+
+        skus = sorted((str(row[1]).lower(), position) for position, row in enumerate(docs))
+        self._skus = [sku for sku, _ in skus]
+        self._sku_docs = np.fromiter((position for _, position in skus), dtype=np.int32, count=len(skus))
+
+        self._build_postings()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def age(self):
+        """Seconds since the index was built"""
+        return (datetime.now() - self.built_at).total_seconds()
+
+    def search(self, query, category='', limit=50, offset=0):
+        """Ids of matching items in rank order, skipping the first offset"""
+        query = str(query or '').replace(_SEP, ' ').lower()
+        if not query or limit <= 0:
+            return []
+        if category and category not in self._categories:
+            return []
+        wanted = offset + limit
+        category_code = self._categories[category] if category else None
+
+        ranked = []
+        seen = set()
+        for positions in (self._sku_matches(query, exact=True), self._sku_matches(query, exact=False),
+                          self._substring_matches(query)):
+            for chunk in positions:
+                if category_code is not None:
+                    chunk = chunk[self._category_of[chunk] == category_code]
+                for position in chunk.tolist():
+                    if position not in seen:
+                        seen.add(position)
+                        ranked.append(position)
+                if len(ranked) >= wanted:
+                    break
+            if len(ranked) >= wanted:
+                break
+
+        return [self.ids[position] for position in ranked[offset:wanted]]
+
+    def _build_postings(self):
+        """Index every trigram of every document as sorted (trigram, document) postings"""
+        codes = []
+        positions = []
+        for start in range(0, len(self.texts), 100000):
+            texts = self.texts[start:start + 100000]
+            points = _code_points(''.join(texts))
+            owner = np.repeat(np.arange(start, start + len(texts), dtype=np.int32), [len(t) for t in texts])
+            grams = _trigrams(points)
+            # Keep trigrams inside one document that do not start on a separator
+            keep = (owner[:-2] == owner[2:]) & (points[:-2] != 0)
+            grams = grams[keep]
+            owner = owner[:-2][keep]
+            # Stable sort keeps documents in name order within each trigram
+            order = np.argsort(grams, kind='stable')
+            grams = grams[order]
+            owner = owner[order]
+            unique = np.ones(len(grams), dtype=bool)
+            unique[1:] = (grams[1:] != grams[:-1]) | (owner[1:] != owner[:-1])
+            codes.append(grams[unique])
+            positions.append(owner[unique])
+
+        codes = np.concatenate(codes) if codes else np.zeros(0, dtype=np.int64)
+        positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int32)
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        self._postings = positions[order]
+        self._grams, starts = np.unique(codes, return_index=True)
+        self._offsets = np.append(starts, len(codes))
+
+    def _sku_matches(self, query, exact):
+        """Documents whose SKU equals, or else starts with, the query"""
+        lo = bisect.bisect_left(self._skus, query)
+        if exact:
+            hi = bisect.bisect_right(self._skus, query, lo)
+        else:
+            lo = bisect.bisect_right(self._skus, query, lo)
+            hi = bisect.bisect_left(self._skus, query + '\U0010ffff', lo)
+        for start in range(lo, hi, _CHUNK):
+            yield self._sku_docs[start:min(start + _CHUNK, hi)]
+
+    def _substring_matches(self, query):
+        """Documents containing the query anywhere, in name order"""
+        points = _code_points(query)
+        if len(points) < 3:
+            yield from self._short_matches(query, points)
+            return
+
+        postings = []
+        for gram in np.unique(_trigrams(points)):
+            slot = np.searchsorted(self._grams, gram)
+            if slot == len(self._grams) or self._grams[slot] != gram:
+                return
+            postings.append(self._postings[self._offsets[slot]:self._offsets[slot + 1]])
+        postings.sort(key=len)
+
+        # Walk the rarest trigram, keeping documents that hold every other one too
+        driver, others = postings[0], postings[1:]
+        for start in range(0, len(driver), _CHUNK):
+            candidates = driver[start:start + _CHUNK]
+            for other in others:
+                slots = np.searchsorted(other, candidates)
+                found = other[np.minimum(slots, len(other) - 1)] == candidates
+                candidates = candidates[found & (slots < len(other))]
+            # Trigrams in the wrong order can pass, so confirm the substring
+            yield np.asarray([p for p in candidates.tolist() if query in self.texts[p]], dtype=np.int32)
+
+    def _short_matches(self, query, points):
+        """Documents containing a one or two character query, in name order"""
+        width = (3 - len(points)) * _SHIFT
+        prefix = int(points[0]) if len(points) == 1 else (int(points[0]) << _SHIFT) | int(points[1])
+        lo = np.searchsorted(self._grams, prefix << width)
+        hi = np.searchsorted(self._grams, (prefix + 1) << width)
+        start, end = self._offsets[lo], self._offsets[hi]
+        if end - start <= _SHORT_UNION_LIMIT:
+            # Trigrams starting with the query are exact occurrences of it
+            matches = np.unique(self._postings[start:end])
+            for chunk_start in range(0, len(matches), _CHUNK):
+                yield matches[chunk_start:chunk_start + _CHUNK]
+            return
+
+        # Common enough that a page fills within the first few documents
+        for chunk_start in range(0, len(self.texts), _CHUNK):
+            texts = self.texts[chunk_start:chunk_start + _CHUNK]
+            yield np.asarray([chunk_start + i for i, text in enumerate(texts) if query in text], dtype=np.int32)
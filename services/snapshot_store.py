@@ -0,0 +1,150 @@
+import os
+import threading
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+from services.file_watcher import file_signature
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; without it analytics read from the database
+    pa = None
+
+# Tables copied into the snapshot store after each sync
+SNAPSHOT_TABLES = ('inventory', 'orders', 'order_items', 'locations', 'transactions')
+
+
+def _arrow_type(python_type):
+    """Arrow column type for a DB-API cursor description type code"""
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type in (float, Decimal):
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp('us')
+    if python_type is date:
+        return pa.date32()
+    if python_type in (bytes, bytearray):
+        return pa.binary()
+    return pa.string()
+
+
+def _column_values(values, arrow_type):
+    """Coerce one column of DB values to what pyarrow accepts for its type"""
+    if pa.types.is_floating(arrow_type):
+        return [None if v is None else float(v) for v in values]
+    if pa.types.is_string(arrow_type):
+        return [v if v is None or isinstance(v, str) else str(v) for v in values]
+    return values
+
+
+class SnapshotStore:
+    """Local Arrow IPC copies of the warehouse tables for analytics.
+
+    Each table is written to a temporary file from batches of rows and then
+    renamed into place, so readers only ever see complete files. Readers
+    memory-map the files, and a loaded table stays cached until its file is
+    replaced. Without pyarrow installed the store is disabled and every
+    read returns None.
+    """
+
+    def __init__(self, directory):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.available = pa is not None
+        self._lock = threading.Lock()
+        self._tables = {}  # name -> (file signature, pyarrow.Table)
+        if self.available:
+            os.makedirs(directory, exist_ok=True)
+        else:
+            self.logger.info("pyarrow is not installed; table snapshots are disabled")
+
+    def path(self, name):
+        """File holding the snapshot of a table"""
+        return os.path.join(self.directory, f"{name}.arrow")
+
+    def write(self, name, rows):
+        """Replace the snapshot of a table; returns the rows written.
+
+        rows yields the column descriptions as (name, python type) pairs
+        first and then batches of row tuples, like DatabaseService.iter_export.
+        """
+        if not self.available:
+            return 0
+        description = next(rows)
+        schema = pa.schema([(column, _arrow_type(python_type)) for column, python_type in description])
+        path = self.path(name)
+        temporary = f"{path}.tmp"
+
+        count = 0
+        try:
+            with pa.OSFile(temporary, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+                for batch in rows:
+                    columns = list(zip(*batch))
+                    arrays = [
+                        pa.array(_column_values(values, field.type), type=field.type)
+                        for values, field in zip(columns, schema)
+                    ]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                    count += len(batch)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        self.logger.info(f"Snapshot of {name} written with {count} rows")
+        return count
+
+    def table(self, name):
+        """Memory-mapped pyarrow Table of a snapshot, or None if there is none"""
+        if not self.available:
+            return None
+        path = self.path(name)
+        signature = file_signature(path)
+        if signature is None:
+            return None
+
+        with self._lock:
+            cached = self._tables.get(name)
+            if cached and cached[0] == signature:
+                return cached[1]
+            # A replaced file gets a new inode, so tables already handed out keep their old mapping
+            try:
+                table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            except FileNotFoundError:
+                return None
+            self._tables[name] = (signature, table)
+            return table
+
+    def frame(self, name, columns=None):
+        """Snapshot of a table as a pandas DataFrame, optionally only some columns, or None"""
+        table = self.table(name)
+        if table is None:
+            return None
+        if columns:
+            table = table.select([column for column in columns if column in table.column_names])
+        return table.to_pandas()
+
+    def has(self, *names):
+        """Whether snapshots of all the named tables exist"""
+        return self.available and all(os.path.exists(self.path(name)) for name in names)
+
+    def status(self):
+        """Rows, size and write time of each snapshot"""
+        status = {'enabled': self.available, 'tables': {}}
+        for name in SNAPSHOT_TABLES:
+            try:
+                stat = os.stat(self.path(name))
+            except OSError:
+                continue
+            table = self.table(name)
+            status['tables'][name] = {
+                'rows': table.num_rows if table is not None else None,
+                'bytes': stat.st_size,
+                'written_at': datetime.fromtimestamp(stat.st_mtime).isoformat()
+            }
+        return status
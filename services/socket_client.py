@@ -0,0 +1,205 @@
+import itertools
+import json
+import socket
+import struct
+import threading
+import time
+import logging
+from collections import deque
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; frames fall back to JSON
+    msgpack = None
+
+# The high bit of the length prefix marks a msgpack body; plain JSON frames
+# keep the original 4-byte big-endian length prefix unchanged.
+MSGPACK_FLAG = 0x80000000
+LENGTH_MASK = 0x7FFFFFFF
+_HEADER = struct.Struct('!I')
+
+
+def encode_frame(payload, encoding='json'):
+    """Encode a payload as a length-prefixed frame"""
+    if encoding == 'msgpack' and msgpack is not None:
+        body = msgpack.packb(payload, use_bin_type=True, default=str)
+        return _HEADER.pack(len(body) | MSGPACK_FLAG) + body
+    body = json.dumps(payload, default=str).encode('utf-8')
+    return _HEADER.pack(len(body)) + body
+
+
+def recv_exact(sock, size):
+    """Read exactly size bytes from a socket into a preallocated bytearray"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError(f"Connection closed after {received} of {size} bytes")
+        received += count
+    return buffer
+
+
+def read_frame(sock):
+    """Read and decode one length-prefixed frame"""
+    header = _HEADER.unpack(recv_exact(sock, 4))[0]
+    return decode_frame(header, recv_exact(sock, header & LENGTH_MASK))
+
+
+def decode_frame(header, body):
+    """Decode a frame body according to the encoding flag in its header"""
+    if header & MSGPACK_FLAG:
+        if msgpack is None:
+            raise ValueError("Received a msgpack frame but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+class _Connection:
+    """One persistent TCP connection to the WMS"""
+
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.last_used = time.monotonic()
+        self.fresh = True
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class WMSSocketClient:
+    """Pooled, persistent client for the WMS length-prefixed frame protocol.
+
+    Requests carry a request_id so several can be pipelined on one connection;
+    responses are matched back by id, or by order for servers that do not echo it.
+    """
+
+    def __init__(self, host, port, timeout=10, pool_size=4, idle_timeout=60, encoding='json'):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+
+        if encoding == 'msgpack' and msgpack is None:
+            self.logger.warning("msgpack is not installed; using JSON socket frames")
+            encoding = 'json'
+        self.encoding = encoding
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._stats = {'connections_opened': 0, 'requests': 0, 'reused': 0}
+
+    def request(self, payload):
+        """Send one request and return its decoded response"""
+        return self.request_many([payload])[0]
+
+    def request_many(self, payloads):
+        """Pipeline several requests and return their responses in request order"""
+        pending = []
+        for payload in payloads:
+            payload = dict(payload)
+            payload['request_id'] = next(self._ids)
+            pending.append(payload)
+        request_ids = [p['request_id'] for p in pending]
+
+        results = {}
+        while pending:
+            conn = self._acquire()
+            try:
+                answered = self._exchange(conn, pending, results)
+            except (OSError, ValueError) as e:
+                conn.close()
+                # A pooled connection may have been closed by the server; retry fresh once
+                if not conn.fresh:
+                    continue
+                raise ConnectionError(f"WMS socket request failed: {e}") from e
+
+            if answered < len(pending):
+                # The server closed the connection after a partial reply
+                conn.close()
+                if answered == 0:
+                    raise ConnectionError("WMS closed the connection without replying")
+                pending = [p for p in pending if p['request_id'] not in results]
+            else:
+                self._release(conn)
+                pending = []
+
+        with self._lock:
+            self._stats['requests'] += len(payloads)
+        return [results[request_id] for request_id in request_ids]
+
+    def close(self):
+        """Close every idle pooled connection"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """Get connection reuse counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        stats['encoding'] = self.encoding
+        return stats
+
+    def _exchange(self, conn, pending, results):
+        """Write all pending frames, then read replies until done or the peer closes"""
+        conn.sock.sendall(b''.join(encode_frame(p, self.encoding) for p in pending))
+
+        expected = [p['request_id'] for p in pending]
+        answered = 0
+        for request_id in expected:
+            try:
+                response = read_frame(conn.sock)
+            except ConnectionError:
+                if answered:
+                    return answered
+                raise
+            response_id = response.get('request_id') if isinstance(response, dict) else None
+            results[response_id if response_id in expected else request_id] = response
+            answered += 1
+        conn.last_used = time.monotonic()
+        return answered
+
+    def _acquire(self):
+        """Borrow an idle connection or open a new one"""
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used > self.idle_timeout:
+                    stale.append(candidate)
+                    continue
+                conn = candidate
+                self._stats['reused'] += 1
+                break
+        for candidate in stale:
+            candidate.close()
+
+        if conn is None:
+            conn = _Connection(self.host, self.port, self.timeout)
+            with self._lock:
+                self._stats['connections_opened'] += 1
+        else:
+            conn.fresh = False
+        return conn
+
+    def _release(self, conn):
+        """Return a connection to the pool, closing it if the pool is full"""
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
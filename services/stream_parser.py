@@ -0,0 +1,106 @@
+import codecs
+import json
+from itertools import islice
+
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_records(fp, chunk_size=64 * 1024):
+    """Yield records from a binary stream holding a JSON array or NDJSON.
+
+    Only the current chunk and the record being decoded are held in memory,
+    so arbitrarily large payloads can be parsed with bounded memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + text_decoder.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip(_WHITESPACE)
+    if pos >= len(buffer):
+        return
+
+    in_array = buffer[pos] == '['
+    if in_array:
+        pos += 1
+
+    while True:
+        skip(_WHITESPACE + ',' if in_array else _WHITESPACE)
+        if pos >= len(buffer):
+            if in_array:
+                raise ValueError("Unterminated JSON array")
+            return
+        if in_array and buffer[pos] == ']':
+            return
+
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number or literal ending at the buffer edge may continue in the next chunk
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            break
+
+        pos = end
+        yield record
+
+
+def iter_batches(records, batch_size):
+    """Group an iterable of records into lists of at most batch_size"""
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def window_batches(batches, skip=0, limit=None):
+    """Yield batches without their first skip records and with at most limit records in total.
+
+    Returns True if records were left past the limit, which a caller can
+    read with ``yield from``.
+    """
+    remaining = limit
+    for batch in batches:
+        if skip:
+            dropped = min(skip, len(batch))
+            batch = batch[dropped:]
+            skip -= dropped
+        if not batch:
+            continue
+        if remaining is not None:
+            if remaining <= 0:
+                return True
+            if len(batch) > remaining:
+                yield batch[:remaining]
+                return True
+            remaining -= len(batch)
+        yield batch
+    return False
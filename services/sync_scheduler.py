@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+
+class SyncScheduler:
+    """Runs WMS syncs in the background on a jittered interval with single-flight locking.
+
+    ``run_sync(job, report)`` performs one sync; it may call ``report(**fields)``
+    to publish progress on the job and must raise on failure. A full sync
+    requested while an incremental one runs is queued to start after it.
+    """
+
+    def __init__(self, run_sync, interval=300, mode='incremental', jitter=0.1,
+                 retry_delay=30, max_backoff=3600, history_size=50):
+        self.logger = logging.getLogger(__name__)
+        self._run_sync = run_sync
+        self.mode = mode
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.history_size = history_size
+
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._current = None
+        self._queued = None
+        self._done = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = None
+        self._consecutive_failures = 0
+        self._next_run_at = None
+
+    def start(self):
+        """Start the periodic sync thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='sync-scheduler', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Sync scheduler started with {self.interval}s interval")
+
+    def stop(self):
+        """Stop the periodic sync thread after the current wait"""
+        self._stop.set()
+
+    def trigger(self, mode=None, trigger='manual'):
+        """Start a sync, or join the one already running.
+
+        A full sync requested while an incremental one runs is queued instead,
+        with status 'queued', and later full requests join it. Returns
+        (job, joined) where joined is True if an existing job was reused.
+        """
+        mode = mode or self.mode
+        with self._lock:
+            if self._current is not None:
+                if mode != 'full' or self._current['mode'] == 'full':
+                    return self._copy(self._current), True
+                if self._queued is not None:
+                    return self._copy(self._queued), True
+                self._queued = self._new_job(mode, trigger, 'queued')
+                return self._copy(self._queued), False
+
+            job = self._current = self._new_job(mode, trigger, 'running')
+            started = self._copy(job)
+
+        self._start(job)
+        return started, False
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes; returns the job, or None if it is unknown"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._done:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] not in ('queued', 'running'):
+                    return self._copy(job) if job else None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return self._copy(job)
+                self._done.wait(remaining)
+
+    def get_job(self, job_id):
+        """Get a copy of a recent job by id"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copy(job) if job else None
+
+    def status(self):
+        """Get scheduler state for the integration status endpoint"""
+        with self._lock:
+            last_job = next(reversed(self._jobs.values()), None)
+            return {
+                'scheduler_running': bool(self._thread and self._thread.is_alive()),
+                'interval': self.interval,
+                'next_run_at': self._next_run_at,
+                'consecutive_failures': self._consecutive_failures,
+                'current_job': self._copy(self._current) if self._current else None,
+                'queued_job': self._copy(self._queued) if self._queued else None,
+                'last_job': self._copy(last_job) if last_job else None
+            }
+
+    def _new_job(self, mode, trigger, status):
+        """Create a job and add it to the history; caller must hold the lock"""
+        job = {
+            'id': uuid.uuid4().hex,
+            'trigger': trigger,
+            'mode': mode,
+            'status': status,
+            'stage': 'starting' if status == 'running' else 'queued',
+            'progress': {},
+            'error': None,
+            'started_at': datetime.now().isoformat() if status == 'running' else None,
+            'finished_at': None
+        }
+        self._jobs[job['id']] = job
+        while len(self._jobs) > self.history_size:
+            self._jobs.popitem(last=False)
+        return job
+
+    def _start(self, job):
+        """Run a job on its own thread"""
+        threading.Thread(target=self._execute, args=(job,), name=f"sync-{job['id'][:8]}", daemon=True).start()
+
+    def _execute(self, job):
+        """Run one sync job and record its outcome"""
+        def report(**fields):
+            with self._lock:
+                job['stage'] = fields.pop('stage', job['stage'])
+                job['progress'].update(fields)
+
+        try:
+            self._run_sync(job, report)
+            status, error = 'succeeded', None
+        except Exception as e:
+            self.logger.error(f"Sync job {job['id']} failed: {e}")
+            status, error = 'failed', str(e)
+
+        with self._done:
+            job['status'] = status
+            job['stage'] = 'done'
+            job['error'] = error
+            job['finished_at'] = datetime.now().isoformat()
+            if status == 'succeeded':
+                self._consecutive_failures = 0
+            else:
+                self._consecutive_failures += 1
+            self._current = queued = self._queued
+            self._queued = None
+            if queued is not None:
+                queued['status'] = 'running'
+                queued['stage'] = 'starting'
+                queued['started_at'] = datetime.now().isoformat()
+            self._done.notify_all()
+
+        if queued is not None:
+            self._start(queued)
+
+    def _loop(self):
+        """Trigger a sync every interval, backing off exponentially after failures"""
+        while not self._stop.is_set():
+            delay = self._next_delay()
+            self._next_run_at = datetime.fromtimestamp(time.time() + delay).isoformat()
+            if self._stop.wait(delay):
+                break
+            job, _ = self.trigger(trigger='scheduled')
+            self.wait(job['id'])
+
+    def _next_delay(self):
+        """Jittered interval, or jittered exponential backoff after failed syncs"""
+        with self._lock:
+            failures = self._consecutive_failures
+        if failures:
+            base = min(self.retry_delay * (2 ** (failures - 1)), self.max_backoff)
+        else:
+            base = self.interval
+        return max(1.0, base * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _copy(self, job):
+        """Copy a job so callers never see it change underneath them"""
+        copied = dict(job)
+        copied['progress'] = dict(job['progress'])
+        return copied
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import logging
+import pandas as pd
+from datetime import datetime, timezone
+
+# Field used as the high-water mark for each WMS entity
+WATERMARK_FIELDS = {
+    'inventory': 'last_movement',
+    'orders': 'last_updated',
+    'transactions': 'timestamp'
+}
+
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp into a naive UTC datetime, or None if it is not one"""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    else:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class SyncState:
+    """Per-entity high-water marks for incremental WMS syncs, persisted as JSON.
+
+    An entity a sync stopped reading at the record limit gets a resume point
+    instead of a new mark: the mark its pass started from, the records
+    written so far and the newest timestamp among them. Later syncs continue
+    from there and advance the mark once the entity has been read to its end.
+    """
+
+    def __init__(self, path=None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self._lock = threading.Lock()
+        self._watermarks = {}
+        self._resume = {}  # entity -> {'since', 'offset', 'mark'}
+        self._load()
+
+    def since(self):
+        """Get the current high-water mark of every entity that has one"""
+        with self._lock:
+            return dict(self._watermarks)
+
+    def resume_points(self):
+        """Get the resume point of every entity a sync left part way through"""
+        with self._lock:
+            return {entity: dict(point) for entity, point in self._resume.items()}
+
+    def collect(self, processed_data, marks=None):
+        """Fold the newest timestamp of each entity in processed_data into marks.
+
+        Lets a multi-batch sync gather marks as it goes and commit them only
+        once everything has been written.
+        """
+        marks = {} if marks is None else marks
+        for entity, field in WATERMARK_FIELDS.items():
+            records = processed_data.get(entity, [])
+            if isinstance(records, pd.DataFrame):
+                self._collect_columnar(entity, records[field], marks)
+                continue
+            for record in records:
+                value = record.get(field)
+                parsed = parse_timestamp(value)
+                if parsed is None:
+                    continue
+                current = marks.get(entity)
+                if current is None or parsed > current[0]:
+                    marks[entity] = (parsed, value if isinstance(value, str) else value.isoformat())
+        return marks
+
+    def _collect_columnar(self, entity, values, marks):
+        """Fold the newest timestamp of a DataFrame column into marks"""
+        values = values.reset_index(drop=True)
+        parsed = pd.to_datetime(values, errors='coerce', utc=True, format='ISO8601')
+        if parsed.isna().all():
+            return
+        position = parsed.idxmax()
+        newest = parsed[position].tz_convert(None).to_pydatetime()
+        current = marks.get(entity)
+        if current is None or newest > current[0]:
+            value = values[position]
+            marks[entity] = (newest, value if isinstance(value, str) else value.isoformat())
+
+    def commit(self, marks, progress=None):
+        """Advance stored high-water marks to the collected ones, never moving backwards.
+
+        ``progress`` maps each entity the sync read to None if it was read to
+        its end, or to (since, offset) if it stopped at the record limit after
+        offset records fetched from the since mark. A stopped entity keeps its
+        mark and gets a resume point; a finished one drops its resume point
+        and advances past everything the earlier syncs of its pass wrote.
+        """
+        with self._lock:
+            for entity, stopped in (progress or {}).items():
+                point = self._resume.pop(entity, None)
+                parsed = parse_timestamp(point['mark']) if point else None
+                if parsed is not None and (entity not in marks or parsed > marks[entity][0]):
+                    marks[entity] = (parsed, point['mark'])
+                if stopped is not None:
+                    newest = marks.pop(entity, None)
+                    self._resume[entity] = {
+                        'since': stopped[0],
+                        'offset': stopped[1],
+                        'mark': newest[1] if newest else None
+                    }
+
+            for entity, (parsed, value) in marks.items():
+                current = parse_timestamp(self._watermarks.get(entity))
+                if current is None or parsed > current:
+                    self._watermarks[entity] = value
+            self._save()
+
+    def reset(self):
+        """Forget every high-water mark so the next sync is a full one"""
+        with self._lock:
+            self._watermarks = {}
+            self._resume = {}
+            self._save()
+
+    def _load(self):
+        """Load persisted watermarks, starting empty if the file is missing or unreadable"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self._watermarks = {k: v for k, v in data.items() if k in WATERMARK_FIELDS}
+            self._resume = {k: v for k, v in data.get('resume', {}).items() if k in WATERMARK_FIELDS}
+        except Exception as e:
+            self.logger.warning(f"Failed to load sync state from {self.path}: {e}")
+
+    def _save(self):
+        """Persist watermarks atomically; caller must hold the lock"""
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(self._watermarks, resume=self._resume), f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.warning(f"Failed to save sync state to {self.path}: {e}")
@@ -0,0 +1,265 @@
+import calendar
+import itertools
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+
+from services.sync_state import parse_timestamp
+
+# Bucket width in seconds per granularity
+GRANULARITIES = {
+    'hourly': 3600,
+    'daily': 86400
+}
+
+# Direction each transaction type moves stock; unknown types count as signed adjustments
+TRANSACTION_SIGNS = {
+    'receive': 1,
+    'return': 1,
+    'pick': -1,
+    'ship': -1,
+    'adjust': 1
+}
+
+# SQLite bound-parameter limit is 999 on older builds
+_PARAM_CHUNK = 500
+
+
+def _chunks(values, size=_PARAM_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class TrendStore:
+    """Per-SKU stock movement rolled up into hourly and daily buckets in SQLite.
+
+    Buckets hold the net stock change of each SKU; stock levels over time are
+    reconstructed backwards from each SKU's current stock, so a trend query
+    reads buckets only and never scans raw transactions. Transactions are
+    de-duplicated by id so re-delivered sync batches are counted once.
+    """
+
+    def __init__(self, path, daily_retention_days=365, hourly_retention_days=14):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.retention = {
+            'daily': daily_retention_days * 86400,
+            'hourly': hourly_retention_days * 86400
+        }
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # The buckets can be rebuilt from the database, so trade fsyncs for write speed
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stock_buckets (
+                granularity TEXT NOT NULL,
+                sku TEXT NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                net_change INTEGER NOT NULL,
+                PRIMARY KEY (granularity, sku, bucket_start)
+            );
+            CREATE INDEX IF NOT EXISTS ix_stock_buckets_time ON stock_buckets (granularity, bucket_start);
+            CREATE TABLE IF NOT EXISTS sku_stock (
+                sku TEXT PRIMARY KEY,
+                current_stock INTEGER,
+                category TEXT
+            );
+            CREATE TABLE IF NOT EXISTS seen_transactions (
+                transaction_id TEXT PRIMARY KEY,
+                occurred_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_seen_transactions_time ON seen_transactions (occurred_at);
+        """)
+        self._conn.commit()
+
+    def is_empty(self):
+        """Whether no transaction has been rolled up yet"""
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM seen_transactions LIMIT 1').fetchone() is None
+
+    def add_transactions(self, records):
+        """Roll new transactions into the buckets; returns how many were new.
+
+        records is a list of transaction dicts or a DataFrame with the
+        transaction_id, type, sku, quantity and timestamp columns.
+        """
+        parsed = {}
+        for transaction_id, tx_type, sku, quantity, timestamp in self._transaction_rows(records):
+            occurred = parse_timestamp(timestamp)
+            try:
+                quantity = int(quantity)
+            except (TypeError, ValueError):
+                continue
+            if not sku or occurred is None:
+                continue
+            epoch = calendar.timegm(occurred.timetuple())
+            key = str(transaction_id) if transaction_id else f"{sku}|{timestamp}|{tx_type}|{quantity}"
+            parsed[key] = (sku, epoch, quantity * TRANSACTION_SIGNS.get(tx_type, 1))
+
+        if not parsed:
+            return 0
+
+        with self._lock:
+            seen = set()
+            for chunk in _chunks(list(parsed)):
+                placeholders = ', '.join('?' for _ in chunk)
+                seen.update(row[0] for row in self._conn.execute(
+                    f'SELECT transaction_id FROM seen_transactions WHERE transaction_id IN ({placeholders})', chunk
+                ))
+            new = {key: value for key, value in parsed.items() if key not in seen}
+
+            changes = {}
+            for sku, epoch, delta in new.values():
+                for granularity, width in GRANULARITIES.items():
+                    bucket = (granularity, sku, epoch - epoch % width)
+                    changes[bucket] = changes.get(bucket, 0) + delta
+
+            self._conn.executemany(
+                'INSERT INTO seen_transactions (transaction_id, occurred_at) VALUES (?, ?)',
+                [(key, epoch) for key, (_, epoch, _) in new.items()]
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO stock_buckets (granularity, sku, bucket_start, net_change) VALUES (?, ?, ?, ?)
+                ON CONFLICT (granularity, sku, bucket_start) DO UPDATE SET net_change = net_change + excluded.net_change
+                """,
+                [bucket + (change,) for bucket, change in changes.items()]
+            )
+            self._prune()
+            self._conn.commit()
+        return len(new)
+
+    def set_stock(self, rows):
+        """Upsert current stock per SKU from (sku, current_stock) or (sku, current_stock, category) rows"""
+        rows = [(row[0], row[1], row[2] if len(row) > 2 else None) for row in rows if row[0]]
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO sku_stock (sku, current_stock, category) VALUES (?, ?, ?)
+                ON CONFLICT (sku) DO UPDATE SET
+                    current_stock = excluded.current_stock,
+                    category = COALESCE(excluded.category, sku_stock.category)
+                """,
+                rows
+            )
+            self._conn.commit()
+
+    def rebuild(self, transactions, stock_rows=()):
+        """Replace every bucket with a rollup of transactions, e.g. a backfill from the database"""
+        # Start the source before clearing anything so a failing query leaves the buckets intact
+        transactions = iter(transactions)
+        first = next(transactions, None)
+        transactions = itertools.chain([first] if first is not None else [], transactions)
+        
+        with self._lock:
+            self._conn.execute('DELETE FROM stock_buckets')
+            self._conn.execute('DELETE FROM seen_transactions')
+            self._conn.commit()
+
+        batch = []
+        total = 0
+        for record in transactions:
+            batch.append(record)
+            if len(batch) >= 10000:
+                total += self.add_transactions(batch)
+                batch = []
+        total += self.add_transactions(batch)
+        self.set_stock(stock_rows)
+        self.logger.info(f"Rebuilt stock trend buckets from {total} transactions")
+        return total
+
+    def series(self, skus=None, category=None, days=30, granularity='daily', top=5):
+        """Stock level of each SKU at the end of every bucket in the range.
+
+        Without skus or category the top SKUs by movement in the range are
+        returned. Returns {'granularity', 'buckets': [iso...], 'series': {sku: [level...]}}.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        width = GRANULARITIES[granularity]
+        now = int(time.time())
+        end = now - now % width
+        start = max(end - (int(days * 86400) // width - 1) * width, now - self.retention[granularity])
+        start -= start % width
+        buckets = list(range(start, end + width, width))
+
+        with self._lock:
+            stock = self._select_stock(skus, category, granularity, start, top)
+            changes = {sku: {} for sku in stock}
+            for chunk in _chunks(list(stock)):
+                placeholders = ', '.join('?' for _ in chunk)
+                for sku, bucket_start, net_change in self._conn.execute(
+                    f"""
+                    SELECT sku, bucket_start, net_change FROM stock_buckets
+                    WHERE granularity = ? AND bucket_start >= ? AND sku IN ({placeholders})
+                    """,
+                    [granularity, start] + chunk
+                ):
+                    changes[sku][bucket_start] = net_change
+
+        # Walk back from today's stock, undoing each bucket's net change
+        series = {}
+        for sku, current_stock in stock.items():
+            level = current_stock or 0
+            levels = []
+            for bucket_start in reversed(buckets):
+                levels.append(level)
+                level -= changes[sku].get(bucket_start, 0)
+            levels.reverse()
+            series[sku] = levels
+
+        return {
+            'granularity': granularity,
+            'buckets': [datetime.fromtimestamp(b, timezone.utc).replace(tzinfo=None).isoformat() for b in buckets],
+            'series': series
+        }
+
+    def _select_stock(self, skus, category, granularity, start, top):
+        """Current stock of the SKUs a trend query covers; caller must hold the lock"""
+        if skus:
+            stock = {sku: None for sku in skus}
+            for chunk in _chunks(list(skus)):
+                placeholders = ', '.join('?' for _ in chunk)
+                stock.update(self._conn.execute(
+                    f'SELECT sku, current_stock FROM sku_stock WHERE sku IN ({placeholders})', chunk
+                ))
+            return stock
+        if category:
+            return dict(self._conn.execute(
+                'SELECT sku, current_stock FROM sku_stock WHERE category = ? ORDER BY sku', (category,)
+            ))
+
+        top_skus = [row[0] for row in self._conn.execute(
+            """
+            SELECT sku FROM stock_buckets
+            WHERE granularity = ? AND bucket_start >= ?
+            GROUP BY sku ORDER BY SUM(ABS(net_change)) DESC LIMIT ?
+            """,
+            (granularity, start, top)
+        )]
+        return self._select_stock(top_skus, None, granularity, start, top) if top_skus else {}
+
+    def _transaction_rows(self, records):
+        """Yield (transaction_id, type, sku, quantity, timestamp) from a list or DataFrame batch"""
+        columns = ['transaction_id', 'type', 'sku', 'quantity', 'timestamp']
+        if hasattr(records, 'itertuples'):
+            yield from records[columns].itertuples(index=False, name=None)
+            return
+        for record in records:
+            yield tuple(record.get(column) for column in columns)
+
+    def _prune(self):
+        """Drop buckets and de-duplication ids past retention; caller must hold the lock"""
+        now = time.time()
+        for granularity, retention in self.retention.items():
+            self._conn.execute(
+                'DELETE FROM stock_buckets WHERE granularity = ? AND bucket_start < ?',
+                (granularity, now - retention)
+            )
+        self._conn.execute(
+            'DELETE FROM seen_transactions WHERE occurred_at < ?',
+            (now - max(self.retention.values()),)
+        )
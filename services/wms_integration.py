@@ -1,18 +1,95 @@
 import requests
-import json
+import os
 import socket
-import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from config import Config
+from services.sync_state import WATERMARK_FIELDS, parse_timestamp
+from services.stream_parser import iter_json_records, iter_batches, window_batches
+from services.socket_client import WMSSocketClient
+from services.command_queue import CommandQueue
+from services.circuit_breaker import CircuitBreaker
+from services.file_watcher import file_signature, file_checksum
+from services.perf import recorder as perf
 import logging
 
+
+def _entity_batches(entity, window):
+    """Yield (entity, batch) pairs from window_batches and return whether it was cut off"""
+    while True:
+        try:
+            batch = next(window)
+        except StopIteration as stop:
+            return bool(stop.value)
+        yield entity, batch
+
+
 class WMSIntegration:
+    NETWORK_TRANSPORTS = ('http', 'socket')
+    
     def __init__(self):
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         self.wms_host = self.config.WMS_APP_HOST
         self.wms_port = int(self.config.WMS_APP_PORT)
         self.api_key = self.config.WMS_API_KEY
+        self.last_fetch_timings = {}
+        
+        # Files written by the C WMS for file-based integration
+        self.data_files = {
+            'inventory': '/tmp/wms_inventory.json',
+            'orders': '/tmp/wms_orders.json',
+            'transactions': '/tmp/wms_transactions.json'
+        }
+        # Signature and checksum of each file as last fully ingested
+        self._ingested_files = {}
+        
+        # Keep-alive connection pool shared by every HTTP call to the WMS
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        })
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config.WMS_HTTP_POOL_SIZE
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._http_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='wms-http')
+        
+        # Persistent, pipelined connections for the socket protocol
+        self.socket_client = WMSSocketClient(
+            self.wms_host,
+            self.wms_port,
+            timeout=self.config.WMS_SOCKET_TIMEOUT,
+            pool_size=self.config.WMS_SOCKET_POOL_SIZE,
+            idle_timeout=self.config.WMS_SOCKET_IDLE_TIMEOUT,
+            encoding=self.config.WMS_SOCKET_ENCODING
+        )
+        
+        # Per-transport health; the transport that last worked is tried first
+        self.breakers = {
+            transport: CircuitBreaker(
+                transport,
+                failure_threshold=self.config.WMS_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=self.config.WMS_BREAKER_RESET_TIMEOUT
+            )
+            for transport in self.NETWORK_TRANSPORTS
+        }
+        self._fetch_transport = 'http'
+        
+        # Outbound commands are batched over the same breakers
+        self._command_transport = 'http'
+        self._http_batch_supported = True
+        self.command_queue = CommandQueue(
+            self.send_commands,
+            maxsize=self.config.WMS_COMMAND_QUEUE_SIZE,
+            batch_size=self.config.WMS_COMMAND_BATCH_SIZE,
+            linger=self.config.WMS_COMMAND_LINGER
+        )
     
     def check_connection(self):
         """Check if C WMS application is reachable"""
@@ -27,51 +104,102 @@ class WMSIntegration:
             self.logger.error(f"WMS connection check failed: {e}")
             return False
     
-    def fetch_latest_data(self):
-        """Fetch latest data from C WMS application"""
-        try:
-            # Method 1: HTTP API (if your C app has REST endpoints)
-            data = self._fetch_via_http()
-            if data:
-                return data
-            
-            # Method 2: Socket communication (if using custom protocol)
-            data = self._fetch_via_socket()
-            if data:
-                return data
-            
-            # Method 3: File-based communication (if WMS writes to files)
-            data = self._fetch_via_files()
-            return data
-            
-        except Exception as e:
-            self.logger.error(f"Error fetching WMS data: {e}")
-            return self._get_mock_wms_data()
+    def transport_status(self):
+        """Get preferred transports and circuit breaker health"""
+        return {
+            'preferred_fetch': self._fetch_transport,
+            'preferred_command': self._command_transport,
+            'breakers': {name: breaker.status() for name, breaker in self.breakers.items()}
+        }
     
-    def _fetch_via_http(self):
-        """Fetch data via HTTP API from C WMS application"""
+    def _transport_order(self, preferred):
+        """Network transports with the preferred one first"""
+        return [preferred] + [t for t in self.NETWORK_TRANSPORTS if t != preferred]
+    
+    def _fetch_remote(self, since=None):
+        """Fetch from the first network transport whose circuit allows it.
+        
+        The transport that last returned data is tried first and transports
+        with an open circuit are skipped, so a dead HTTP side costs nothing
+        once the socket is known to work. Returns (transport, data), or
+        (None, None) if no network transport returned data.
+        """
+        for transport in self._transport_order(self._fetch_transport):
+            breaker = self.breakers[transport]
+            if not breaker.allow():
+                continue
+            
+            fetch = self._fetch_via_http if transport == 'http' else self._fetch_via_socket
+            started = time.perf_counter()
+            data = fetch(since)
+            elapsed = time.perf_counter() - started
+            records = sum(len(v) for v in data.values() if isinstance(v, list)) if data else None
+            perf.observe('wms', f'fetch.{transport}', elapsed, rows=records, error=not data)
+            if not data:
+                breaker.record_failure(f"no data via {transport}")
+                continue
+            
+            breaker.record_success(elapsed)
+            if transport != self._fetch_transport:
+                self.logger.info(f"WMS fetches switched to {transport} transport")
+                self._fetch_transport = transport
+            return transport, data
+        
+        return None, None
+    
+    def _filter_changed(self, wms_data, since):
+        """Drop records older than their entity's high-water mark.
+
+        Guards against WMS endpoints that ignore the since parameter. Records
+        without a parseable timestamp are kept.
+        """
+        if not wms_data or not since:
+            return wms_data
+        
+        filtered = dict(wms_data)
+        for entity, field in WATERMARK_FIELDS.items():
+            watermark = parse_timestamp(since.get(entity))
+            records = wms_data.get(entity)
+            if watermark is None or not isinstance(records, list):
+                continue
+            
+            changed = []
+            for record in records:
+                timestamp = parse_timestamp(record.get(field)) if isinstance(record, dict) else None
+                if timestamp is None or timestamp >= watermark:
+                    changed.append(record)
+            filtered[entity] = changed
+        
+        return filtered
+    
+    def _fetch_via_http(self, since=None):
+        """Fetch data via HTTP API from C WMS application.
+
+        The endpoints are requested concurrently over the shared keep-alive
+        session; endpoints that fail are left out of the result as before.
+        """
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             endpoints = {
                 'inventory': f'http://{self.wms_host}:{self.wms_port}/api/inventory',
                 'orders': f'http://{self.wms_host}:{self.wms_port}/api/orders',
                 'transactions': f'http://{self.wms_host}:{self.wms_port}/api/transactions'
             }
             
+            futures = {
+                data_type: self._http_executor.submit(self._fetch_endpoint, data_type, url, since)
+                for data_type, url in endpoints.items()
+            }
+            
             wms_data = {}
-            for data_type, url in endpoints.items():
-                try:
-                    response = requests.get(url, headers=headers, timeout=10)
-                    if response.status_code == 200:
-                        wms_data[data_type] = response.json()
-                    else:
-                        self.logger.warning(f"HTTP {response.status_code} for {data_type}")
-                except requests.RequestException as e:
-                    self.logger.warning(f"HTTP request failed for {data_type}: {e}")
+            timings = {}
+            for data_type, future in futures.items():
+                data, elapsed = future.result()
+                timings[data_type] = round(elapsed, 4)
+                if data is not None:
+                    wms_data[data_type] = data
+            
+            self.last_fetch_timings = timings
+            self.logger.info(f"WMS HTTP fetch timings (s): {timings}")
             
             return wms_data if wms_data else None
             
@@ -79,140 +207,251 @@ class WMSIntegration:
             self.logger.error(f"HTTP fetch failed: {e}")
             return None
     
-    def _fetch_via_socket(self):
+    def _fetch_endpoint(self, data_type, url, since=None):
+        """Fetch one WMS endpoint, returning (data or None, elapsed seconds)"""
+        started = time.perf_counter()
+        try:
+            params = {'since': since[data_type]} if since and since.get(data_type) else None
+            response = self.session.get(url, params=params, timeout=self.config.WMS_HTTP_TIMEOUT)
+            if response.status_code == 200:
+                data = response.json()
+                elapsed = time.perf_counter() - started
+                perf.observe('wms', f'http.{data_type}', elapsed,
+                             rows=len(data) if isinstance(data, list) else None, nbytes=len(response.content))
+                return data, elapsed
+            self.logger.warning(f"HTTP {response.status_code} for {data_type}")
+        except (requests.RequestException, ValueError) as e:
+            self.logger.warning(f"HTTP request failed for {data_type}: {e}")
+        elapsed = time.perf_counter() - started
+        perf.observe('wms', f'http.{data_type}', elapsed, error=True)
+        return None, elapsed
+    
+    def _fetch_via_socket(self, since=None):
         """Fetch data via socket communication with C WMS application"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)
-            sock.connect((self.wms_host, self.wms_port))
-            
             # Send request for data (customize based on your C app protocol)
             request = {
                 'action': 'get_data',
                 'api_key': self.api_key,
                 'timestamp': datetime.now().isoformat()
             }
+            if since:
+                request['since'] = since
             
-            request_data = json.dumps(request).encode('utf-8')
-            request_length = struct.pack('!I', len(request_data))
-            
-            sock.send(request_length + request_data)
-            
-            # Receive response
-            response_length = struct.unpack('!I', sock.recv(4))[0]
-            response_data = b''
-            
-            while len(response_data) < response_length:
-                chunk = sock.recv(response_length - len(response_data))
-                if not chunk:
-                    break
-                response_data += chunk
-            
-            sock.close()
-            
-            if response_data:
-                return json.loads(response_data.decode('utf-8'))
+            response = self.socket_client.request(request)
+            if response:
+                response.pop('request_id', None)
+                return response
             
         except Exception as e:
             self.logger.error(f"Socket communication failed: {e}")
             return None
     
-    def _fetch_via_files(self):
-        """Fetch data from files written by C WMS application"""
-        try:
-            import os
-            
-            # Define file paths where C WMS writes data
-            data_files = {
-                'inventory': '/tmp/wms_inventory.json',
-                'orders': '/tmp/wms_orders.json',
-                'transactions': '/tmp/wms_transactions.json'
-            }
-            
-            wms_data = {}
-            for data_type, file_path in data_files.items():
-                try:
-                    if os.path.exists(file_path):
-                        with open(file_path, 'r') as f:
-                            wms_data[data_type] = json.load(f)
-                except Exception as e:
-                    self.logger.warning(f"Failed to read {file_path}: {e}")
-            
-            return wms_data if wms_data else None
-            
-        except Exception as e:
-            self.logger.error(f"File-based fetch failed: {e}")
-            return None
+    def _iter_file_records(self, file_path):
+        """Stream records from a WMS data file holding a JSON array or NDJSON"""
+        with open(file_path, 'rb') as f:
+            yield from iter_json_records(f, self.config.WMS_STREAM_CHUNK_SIZE)
+    
+    def iter_latest_batches(self, since=None, offsets=None, limit=None, status=None):
+        """Yield (entity, records) batches of the latest WMS data.
+
+        HTTP and socket payloads arrive whole and are split into batches; the
+        file transport is parsed incrementally so memory stays bounded by the
+        batch size regardless of file size. Raises ConnectionError if no
+        transport has data.
+
+        ``offsets`` maps entities to a number of leading records to skip,
+        already written by an earlier sync that stopped part way. At most
+        ``limit`` records of each entity are yielded. ``status``, if given,
+        receives 'complete' or 'cut_off' for every entity read to its end or
+        stopped at the limit; a cut-off data file is read again next time.
+        """
+        batch_size = self.config.WMS_STREAM_BATCH_SIZE
+        offsets = offsets or {}
+        status = {} if status is None else status
+        
+        _, data = self._fetch_remote(since)
+        if data:
+            data = self._filter_changed(data, since)
+            for entity, records in data.items():
+                window = window_batches(iter_batches(records, batch_size), offsets.get(entity, 0), limit)
+                cut_off = yield from _entity_batches(entity, window)
+                status[entity] = 'cut_off' if cut_off else 'complete'
+            return
+        
+        available = {entity: path for entity, path in self.data_files.items() if os.path.exists(path)}
+        if not available:
+            raise ConnectionError("No WMS transport returned data")
+        
+        for entity, file_path in available.items():
+            signature = file_signature(file_path)
+            if signature is None:
+                continue
+            if time.time() - signature[1] / 1e9 < self.config.WMS_FILE_SETTLE_TIME:
+                self.logger.info(f"Skipping {file_path}; it is still being written")
+                continue
+            try:
+                checksum = file_checksum(file_path)
+                if since and self._ingested_files.get(file_path, (None, None))[1] == checksum:
+                    self._ingested_files[file_path] = (signature, checksum)
+                    self.logger.debug(f"Skipping unchanged {file_path}")
+                    status[entity] = 'complete'
+                    continue
+                
+                read = {'seconds': 0.0, 'records': 0}
+                reader = self._read_file_batches(entity, file_path, since, read)
+                cut_off = yield from _entity_batches(
+                    entity, window_batches(reader, offsets.get(entity, 0), limit)
+                )
+                # A cut-off file is left part read; close it now rather than on collection
+                reader.close()
+                perf.observe('wms', 'fetch.file', read['seconds'], rows=read['records'], nbytes=signature[2])
+                status[entity] = 'cut_off' if cut_off else 'complete'
+                
+                # Only remember a version that was read whole and not replaced while being read
+                if not cut_off and file_signature(file_path) == signature:
+                    self._ingested_files[file_path] = (signature, checksum)
+            except Exception as e:
+                self.logger.warning(f"Failed to read {file_path}: {e}")
+    
+    def _read_file_batches(self, entity, file_path, since, read):
+        """Yield changed records of a data file in batches, adding read time and records to read.
+
+        Only the reading and parsing are timed, not the caller's work between batches.
+        """
+        batches = iter_batches(self._iter_file_records(file_path), self.config.WMS_STREAM_BATCH_SIZE)
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, None)
+            read['seconds'] += time.perf_counter() - started
+            if batch is None:
+                return
+            read['records'] += len(batch)
+            yield self._filter_changed({entity: batch}, since)[entity]
     
     def send_command(self, command, parameters=None):
         """Send command to C WMS application"""
-        try:
-            if self._send_via_http(command, parameters):
-                return True
-            
-            if self._send_via_socket(command, parameters):
-                return True
-            
-            return False
-            
-        except Exception as e:
-            self.logger.error(f"Error sending command to WMS: {e}")
-            return False
+        return self.send_commands([{'command': command, 'parameters': parameters}])[0]['success']
     
-    def _send_via_http(self, command, parameters):
-        """Send command via HTTP"""
-        try:
-            url = f'http://{self.wms_host}:{self.wms_port}/api/command'
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
+    def send_commands(self, batch):
+        """Send several commands in batched requests.
+        
+        Each item is a {'command', 'parameters'} dict or a (command, parameters)
+        tuple. Returns one {'command', 'success', 'transport', 'error'} result
+        per command, in order.
+        """
+        commands = []
+        for item in batch:
+            if isinstance(item, dict):
+                command, parameters = item.get('command'), item.get('parameters')
+            else:
+                command, parameters = item[0], (item[1] if len(item) > 1 else None)
+            commands.append({'command': command, 'parameters': parameters or {}})
+        
+        results = []
+        for chunk in iter_batches(commands, self.config.WMS_COMMAND_BATCH_SIZE):
+            results.extend(self._send_command_chunk(chunk))
+        return results
+    
+    def submit_command(self, command, parameters=None, timeout=None):
+        """Queue a command for batched delivery and return a Future for its result"""
+        return self.command_queue.submit(command, parameters, timeout=timeout)
+    
+    def command_stats(self):
+        """Get the active command transport and queue depth"""
+        return {
+            'transport': self._command_transport,
+            'http_batch_supported': self._http_batch_supported,
+            'queued': self.command_queue.pending()
+        }
+    
+    def _send_command_chunk(self, chunk):
+        """Send one batch over the transport that last worked, falling back to the other"""
+        preferred = self._command_transport
+        errors = []
+        for transport in self._transport_order(preferred):
+            breaker = self.breakers[transport]
+            if not breaker.allow():
+                errors.append(f"{transport}: circuit open")
+                continue
+            
+            send = self._send_batch_via_http if transport == 'http' else self._send_batch_via_socket
+            started = time.perf_counter()
+            try:
+                outcomes = send(chunk)
+            except Exception as e:
+                perf.observe('wms', f'commands.{transport}', time.perf_counter() - started, rows=len(chunk), error=True)
+                self.logger.warning(f"{transport.upper()} command batch failed: {e}")
+                breaker.record_failure(e)
+                errors.append(f"{transport}: {e}")
+                continue
+            
+            elapsed = time.perf_counter() - started
+            perf.observe('wms', f'commands.{transport}', elapsed, rows=len(chunk))
+            breaker.record_success(elapsed)
+            if transport != self._command_transport:
+                self.logger.info(f"WMS commands switched to {transport} transport")
+                self._command_transport = transport
+            return [
+                {
+                    'command': command['command'],
+                    'success': success,
+                    'transport': transport,
+                    'error': error
+                }
+                for command, (success, error) in zip(chunk, outcomes)
+            ]
+        
+        self.logger.error(f"Error sending {len(chunk)} commands to WMS: {'; '.join(errors)}")
+        return [
+            {'command': command['command'], 'success': False, 'transport': None, 'error': '; '.join(errors)}
+            for command in chunk
+        ]
+    
+    def _send_batch_via_http(self, chunk):
+        """Send commands via the HTTP batch endpoint; raises if the WMS is unreachable"""
+        timestamp = datetime.now().isoformat()
+        if self._http_batch_supported:
+            url = f'http://{self.wms_host}:{self.wms_port}/api/commands'
             payload = {
-                'command': command,
-                'parameters': parameters or {},
-                'timestamp': datetime.now().isoformat()
+                'commands': [dict(command, timestamp=timestamp) for command in chunk],
+                'timestamp': timestamp
             }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            return response.status_code == 200
-            
-        except Exception as e:
-            self.logger.error(f"HTTP command send failed: {e}")
-            return False
+            response = self.session.post(url, json=payload, timeout=self.config.WMS_HTTP_TIMEOUT)
+            if response.status_code not in (404, 405):
+                response.raise_for_status()
+                results = response.json().get('results', [])
+                if len(results) != len(chunk):
+                    raise ValueError(f"Expected {len(chunk)} command results, got {len(results)}")
+                return [(bool(r.get('success', False)), r.get('error')) for r in results]
+            
+            self.logger.info("WMS has no batch command endpoint; sending commands individually")
+            self._http_batch_supported = False
+        
+        # Older WMS builds only accept one command per request; reuse the keep-alive session
+        url = f'http://{self.wms_host}:{self.wms_port}/api/command'
+        outcomes = []
+        for command in chunk:
+            response = self.session.post(url, json=dict(command, timestamp=timestamp), timeout=self.config.WMS_HTTP_TIMEOUT)
+            success = response.status_code == 200
+            outcomes.append((success, None if success else f'HTTP {response.status_code}'))
+        return outcomes
     
-    def _send_via_socket(self, command, parameters):
-        """Send command via socket"""
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)
-            sock.connect((self.wms_host, self.wms_port))
-            
-            request = {
+    def _send_batch_via_socket(self, chunk):
+        """Send commands as pipelined socket requests; raises if the WMS is unreachable"""
+        timestamp = datetime.now().isoformat()
+        frames = [
+            {
                 'action': 'execute_command',
-                'command': command,
-                'parameters': parameters or {},
+                'command': command['command'],
+                'parameters': command['parameters'],
                 'api_key': self.api_key,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': timestamp
             }
-            
-            request_data = json.dumps(request).encode('utf-8')
-            request_length = struct.pack('!I', len(request_data))
-            
-            sock.send(request_length + request_data)
-            
-            # Wait for acknowledgment
-            ack_length = struct.unpack('!I', sock.recv(4))[0]
-            ack_data = sock.recv(ack_length)
-            
-            sock.close()
-            
-            response = json.loads(ack_data.decode('utf-8'))
-            return response.get('success', False)
-            
-        except Exception as e:
-            self.logger.error(f"Socket command send failed: {e}")
-            return False
+            for command in chunk
+        ]
+        responses = self.socket_client.request_many(frames)
+        return [(bool(r.get('success', False)), r.get('error')) for r in responses]
     
     def _get_mock_wms_data(self):
         """Return mock WMS data for testing"""
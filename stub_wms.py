@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Stub C WMS socket server
+
+Speaks the length-prefixed frame protocol used by the socket transport so the
+integration can be exercised and benchmarked without the real WMS. Connections
+are persistent and pipelined requests are answered in order with their
+request_id echoed back. Replies use the encoding of the request frame.
+"""
+
+import argparse
+import logging
+import random
+import socket
+import socketserver
+import struct
+import threading
+from datetime import datetime, timedelta
+
+from services.socket_client import LENGTH_MASK, MSGPACK_FLAG, decode_frame, encode_frame, recv_exact
+
+
+def generate_dataset(inventory_count=100, order_count=50, transaction_count=200):
+    """Build a deterministic synthetic WMS dataset"""
+    rng = random.Random(42)
+    now = datetime.now()
+    statuses = ['pending', 'processing', 'packed', 'shipped']
+    transaction_types = ['receive', 'pick', 'adjust']
+
+    return {
+        'inventory': [
+            {
+                'sku': f'SKU-{i:06d}',
+                'current_stock': rng.randint(0, 1000),
+                'location': f"{'ABCDE'[i % 5]}-{i % 4 + 1:02d}-R{i % 3 + 1}-S{i % 6 + 1}",
+                'last_movement': (now - timedelta(minutes=i)).isoformat()
+            }
+            for i in range(inventory_count)
+        ],
+        'orders': [
+            {
+                'order_number': f'ORD-{i:06d}',
+                'status': statuses[i % len(statuses)],
+                'last_updated': (now - timedelta(minutes=i)).isoformat()
+            }
+            for i in range(order_count)
+        ],
+        'transactions': [
+            {
+                'transaction_id': f'TXN-{i:08d}',
+                'type': transaction_types[i % len(transaction_types)],
+                'sku': f'SKU-{rng.randrange(max(inventory_count, 1)):06d}',
+                'quantity': rng.randint(1, 50),
+                'timestamp': (now - timedelta(seconds=i * 30)).isoformat()
+            }
+            for i in range(transaction_count)
+        ]
+    }
+
+
+class StubWMSHandler(socketserver.BaseRequestHandler):
+    """Serve frames on one persistent connection until the client disconnects"""
+
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                header = struct.unpack('!I', recv_exact(self.request, 4))[0]
+                body = recv_exact(self.request, header & LENGTH_MASK)
+            except ConnectionError:
+                return
+            encoding = 'msgpack' if header & MSGPACK_FLAG else 'json'
+
+            response = self.server.respond(decode_frame(header, body))
+            self.request.sendall(encode_frame(response, encoding))
+
+
+class StubWMSServer(socketserver.ThreadingTCPServer):
+    """Threaded stub WMS serving a synthetic dataset"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, dataset=None, api_key=None):
+        super().__init__(address, StubWMSHandler)
+        self.dataset = dataset if dataset is not None else generate_dataset()
+        self.api_key = api_key
+        self.commands = []
+        self._lock = threading.Lock()
+
+    def respond(self, request):
+        """Build the reply for one request frame"""
+        reply = {'request_id': request.get('request_id')}
+        if self.api_key and request.get('api_key') != self.api_key:
+            reply.update({'success': False, 'error': 'unauthorized'})
+            return reply
+
+        action = request.get('action')
+        if action == 'get_data':
+            reply.update(self.dataset)
+        elif action == 'execute_command':
+            with self._lock:
+                self.commands.append({
+                    'command': request.get('command'),
+                    'parameters': request.get('parameters')
+                })
+            reply['success'] = True
+        elif action == 'ping':
+            reply['success'] = True
+        else:
+            reply.update({'success': False, 'error': f'unknown action: {action}'})
+        return reply
+
+
+def main():
+    """Run the stub WMS from the command line"""
+    parser = argparse.ArgumentParser(description='Stub C WMS socket server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--inventory', type=int, default=100, help='number of inventory records')
+    parser.add_argument('--orders', type=int, default=50, help='number of orders')
+    parser.add_argument('--transactions', type=int, default=200, help='number of transactions')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    dataset = generate_dataset(args.inventory, args.orders, args.transactions)
+    server = StubWMSServer((args.host, args.port), dataset)
+    logging.info(f"Stub WMS listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Stub WMS stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Keep the local state files the app writes out of the working tree
+_STATE_DIR = tempfile.mkdtemp(prefix='wms-tests-')
+os.environ.setdefault('METRICS_DB_PATH', os.path.join(_STATE_DIR, 'metrics.db'))
+os.environ.setdefault('SNAPSHOT_DIR', os.path.join(_STATE_DIR, 'snapshots'))
+os.environ.setdefault('SYNC_STATE_FILE', os.path.join(_STATE_DIR, 'sync_state.json'))
+os.environ.setdefault('SYNC_SCHEDULER_ENABLED', 'False')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """The Flask app module with its database unreachable"""
+    import app as app_module
+
+    def unavailable():
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(app_module.db_service.pool, '_connect', unavailable)
+    app_module.response_cache.clear()
+    return app_module
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+
+from services.data_processor import DataProcessor
+
+# Values int() accepts, rejects, or accepts beyond the 64-bit range the tables hold
+MIXED_VALUES = [
+    1, -4, True, 7.9, -7.9, 2.0 ** 63, float('nan'), float('inf'), Decimal('4.5'),
+    '2', ' 3 ', '+5', '1_000', '7.5', '1e3', 'abc', '', None,
+    2 ** 63 - 1, -2 ** 63, 2 ** 63, 2 ** 70, [1], {'n': 1}
+]
+
+
+@pytest.fixture
+def processor():
+    return DataProcessor()
+
+
+def _strip(rows):
+    return [{key: value for key, value in row.items() if key != 'processed_at'} for row in rows]
+
+
+def _both_paths(processor, entity, records):
+    """Processed rows and reject counts of the per-record and columnar paths"""
+    per_record_process = {
+        'inventory': processor._process_inventory_data,
+        'transactions': processor._process_transactions_data
+    }[entity]
+    before = processor.reject_count
+    per_record = _strip(per_record_process(records))
+    per_record_rejects = processor.reject_count - before
+
+    before = processor.reject_count
+    columnar = _strip(processor._process_columnar(entity, records).to_dict('records'))
+    columnar_rejects = processor.reject_count - before
+    return (per_record, per_record_rejects), (columnar, columnar_rejects)
+
+
+@pytest.mark.parametrize('entity, column, key', [
+    ('inventory', 'current_stock', 'sku'),
+    ('transactions', 'quantity', 'transaction_id')
+])
+def test_columnar_matches_per_record_on_mixed_input(processor, entity, column, key):
+    records = [{key: f'ID-{i}', column: value} for i, value in enumerate(MIXED_VALUES)]
+    # A record without the column takes the default
+    records.append({key: 'ID-absent'})
+
+    per_record, columnar = _both_paths(processor, entity, records)
+    assert columnar == per_record
+    accepted = {row[key]: row[column] for row in columnar[0]}
+    assert accepted['ID-absent'] == 0
+    assert accepted['ID-3'] == 7
+    assert 'ID-13' not in accepted  # '7.5'
+    assert 'ID-14' not in accepted  # '1e3'
+    assert 'ID-21' not in accepted  # 2 ** 70
+
+
+@pytest.mark.parametrize('values', [
+    [1, 2, 3],
+    [1.5, -2.5, 3.0],
+    [1, 2 ** 64],
+    ['4', 5, 6.0]
+])
+def test_columnar_matches_per_record_for_uniform_columns(processor, values):
+    records = [{'sku': f'SKU-{i}', 'current_stock': value} for i, value in enumerate(values)]
+    per_record, columnar = _both_paths(processor, 'inventory', records)
+    assert columnar == per_record
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import numpy as np
+
+METRIC_KEYS = {'total_orders', 'orders_processed', 'orders_shipped', 'inventory_value',
+               'low_stock_items', 'utilization_rate', 'picking_efficiency', 'on_time_delivery'}
+
+AGGREGATES = {
+    'total_orders': np.int64(200), 'orders_processed': np.int64(120), 'orders_shipped': np.int64(80),
+    'orders_shipped_on_time': np.int64(76), 'units_picked': np.int64(450), 'units_to_pick': np.int64(500),
+    'inventory_value': Decimal('1234.50'), 'inventory_units': np.int64(900), 'low_stock_items': np.int64(3),
+    'utilization_rate': np.float64(71.25), 'pick_count': np.int64(40), 'units_picked_30d': np.int64(400),
+    'pick_span_minutes': np.float64(600.0)
+}
+
+
+def test_warehouse_metrics_keep_the_dashboard_keys(app_module, monkeypatch):
+    db_service = app_module.db_service
+    monkeypatch.setattr(db_service, 'query_warehouse_metrics', lambda: dict(AGGREGATES))
+
+    metrics = db_service.get_warehouse_metrics()
+    assert set(metrics) == METRIC_KEYS
+    assert metrics['picking_efficiency'] == 90.0
+    assert metrics['on_time_delivery'] == 95.0
+    assert metrics['inventory_value'] == 1234.5
+    assert set(db_service._get_mock_metrics()) == METRIC_KEYS
+
+
+def test_metrics_fallback_serves_the_dashboard_keys(app_module, monkeypatch):
+    def snapshot_failed():
+        raise RuntimeError("metrics store unavailable")
+
+    monkeypatch.setattr(app_module.metrics_store, 'latest', lambda: None)
+    monkeypatch.setattr(app_module, 'take_metrics_snapshot', snapshot_failed)
+    monkeypatch.setattr(app_module.db_service, 'query_warehouse_metrics', lambda: dict(AGGREGATES))
+
+    response = app_module.app.test_client().get('/api/metrics')
+    assert response.status_code == 200
+    assert set(response.get_json()['data']) == METRIC_KEYS
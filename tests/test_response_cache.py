@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    """Test client whose metrics snapshot cannot be taken either"""
+    def snapshot_failed():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(app_module.metrics_store, 'latest', lambda: None)
+    monkeypatch.setattr(app_module, 'take_metrics_snapshot', snapshot_failed)
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/metrics',
+    '/api/inventory',
+    '/api/inventory?limit=2',
+    '/api/orders',
+    '/api/orders?limit=2'
+])
+def test_mock_fallback_is_not_cached(app_module, client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.get_json()['success']
+    assert app_module.response_cache.stats()['entries'] == 0
+
+    second = client.get(url)
+    assert second.headers['X-Cache'] == 'MISS'
+
+
+def test_database_rows_are_cached(app_module, client, monkeypatch):
+    rows = [{'id': 1, 'sku': 'SKU-1'}]
+    monkeypatch.setattr(app_module.db_service, 'get_inventory_data', lambda search, category: rows)
+
+    assert client.get('/api/inventory').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/inventory').headers['X-Cache'] == 'HIT'
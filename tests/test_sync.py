@@ -0,0 +1,100 @@
+import json
+import os
+import time
+
+import pytest
+
+from config import Config
+from services.database import _column_rows
+from services.sync_state import SyncState
+
+CAP = 50
+
+
+@pytest.fixture
+def sync_env(app_module, monkeypatch, tmp_path):
+    """run_sync with a small record cap, fresh sync state and recorded database writes"""
+    monkeypatch.setattr(Config, 'MAX_RECORDS_PER_SYNC', CAP)
+    monkeypatch.setattr(Config, 'WMS_STREAM_BATCH_SIZE', 20)
+    monkeypatch.setattr(app_module, 'sync_state', SyncState(str(tmp_path / 'sync_state.json')))
+    monkeypatch.setattr(app_module, 'write_table_snapshots', lambda: None)
+    monkeypatch.setattr(app_module.data_processor, 'update_trends', lambda entity, records: None)
+
+    written = {'inventory': [], 'orders': []}
+
+    def update_data(processed_data):
+        inventory = list(_column_rows(processed_data.get('inventory', []), ['sku']))
+        orders = list(_column_rows(processed_data.get('orders', []), ['order_number']))
+        written['inventory'].extend(row[0] for row in inventory)
+        written['orders'].extend(row[0] for row in orders)
+        return {'inventory': len(inventory), 'orders': len(orders)}
+
+    monkeypatch.setattr(app_module.db_service, 'update_data', update_data)
+    return app_module, written
+
+
+def _dataset(count, timestamped):
+    """count inventory records and count orders, all stamped alike or not at all"""
+    stamp = {'last_movement': '2026-01-01T00:00:00'} if timestamped else {}
+    return {
+        'inventory': [dict(stamp, sku=f'SKU-{i:04d}', current_stock=i) for i in range(count)],
+        'orders': [
+            dict({'last_updated': '2026-01-01T00:00:00'} if timestamped else {},
+                 order_number=f'ORD-{i:04d}', status='packed')
+            for i in range(count)
+        ]
+    }
+
+
+def _sync(app_module, mode='incremental'):
+    app_module.run_sync({'id': 'test', 'mode': mode}, lambda **fields: None)
+
+
+@pytest.mark.parametrize('timestamped', [True, False])
+def test_two_syncs_write_twice_the_cap(sync_env, monkeypatch, timestamped):
+    app_module, written = sync_env
+    data = _dataset(2 * CAP, timestamped)
+    monkeypatch.setattr(app_module.wms_integration, '_fetch_remote', lambda since: ('socket', data))
+
+    _sync(app_module)
+    assert len(written['inventory']) == CAP
+    # One entity over the cap does not hold back the next
+    assert len(written['orders']) == CAP
+
+    _sync(app_module)
+    assert sorted(written['inventory']) == [r['sku'] for r in data['inventory']]
+    assert sorted(written['orders']) == [r['order_number'] for r in data['orders']]
+    assert app_module.sync_state.resume_points() == {}
+
+
+def test_full_sync_over_the_cap_completes(sync_env, monkeypatch):
+    app_module, written = sync_env
+    data = _dataset(2 * CAP, timestamped=True)
+    monkeypatch.setattr(app_module.wms_integration, '_fetch_remote', lambda since: ('socket', data))
+
+    _sync(app_module, mode='full')
+    _sync(app_module)
+    assert sorted(written['inventory']) == [r['sku'] for r in data['inventory']]
+    assert app_module.sync_state.since()['inventory'] == '2026-01-01T00:00:00'
+
+
+def test_file_transport_resumes_a_cut_off_file(sync_env, monkeypatch, tmp_path):
+    app_module, written = sync_env
+    data = _dataset(2 * CAP, timestamped=False)
+    path = tmp_path / 'inventory.ndjson'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in data['inventory']))
+    settled = time.time() - 60
+    os.utime(path, (settled, settled))
+
+    integration = app_module.wms_integration
+    monkeypatch.setattr(integration, '_fetch_remote', lambda since: (None, None))
+    monkeypatch.setattr(integration, 'data_files', {'inventory': str(path)})
+    monkeypatch.setattr(integration, '_ingested_files', {})
+
+    _sync(app_module)
+    assert len(written['inventory']) == CAP
+    assert str(path) not in integration._ingested_files
+
+    _sync(app_module)
+    assert sorted(written['inventory']) == [r['sku'] for r in data['inventory']]
+    assert str(path) in integration._ingested_files
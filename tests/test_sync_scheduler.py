@@ -0,0 +1,49 @@
+import threading
+
+from services.sync_scheduler import SyncScheduler
+
+
+def _scheduler():
+    """Scheduler whose syncs record their mode and block until released"""
+    release = threading.Event()
+    ran = []
+
+    def run_sync(job, report):
+        ran.append(job['mode'])
+        release.wait(5)
+
+    return SyncScheduler(run_sync), release, ran
+
+
+def test_full_sync_is_queued_behind_incremental():
+    scheduler, release, ran = _scheduler()
+    incremental, joined = scheduler.trigger(mode='incremental')
+    assert not joined
+
+    full, joined = scheduler.trigger(mode='full')
+    assert not joined
+    assert full['id'] != incremental['id']
+    assert full['status'] == 'queued'
+    assert scheduler.status()['queued_job']['id'] == full['id']
+
+    again, joined = scheduler.trigger(mode='full')
+    assert joined and again['id'] == full['id']
+    assert scheduler.trigger(mode='incremental')[0]['id'] == incremental['id']
+
+    release.set()
+    assert scheduler.wait(full['id'], timeout=5)['status'] == 'succeeded'
+    assert ran == ['incremental', 'full']
+    assert scheduler.status()['queued_job'] is None
+
+
+def test_requests_join_a_running_full_sync():
+    scheduler, release, ran = _scheduler()
+    full, _ = scheduler.trigger(mode='full')
+
+    for mode in ('full', 'incremental'):
+        job, joined = scheduler.trigger(mode=mode)
+        assert joined and job['id'] == full['id']
+
+    release.set()
+    assert scheduler.wait(full['id'], timeout=5)['status'] == 'succeeded'
+    assert ran == ['full']